@@ -0,0 +1,88 @@
+"""Compares the JSON codecs on a server list page and a websocket stats frame.
+
+    python benchmarks/codec.py
+
+Codecs for libraries that are not installed are skipped.
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pytero.codec import get_codec  # noqa: E402
+
+
+def server(i: int) -> dict:
+    return {
+        'object': 'server',
+        'attributes': {
+            'id': i,
+            'external_id': None,
+            'uuid': '5f2c8a2e-0d7a-4d5d-9b8e-%012d' % i,
+            'identifier': '%08x' % i,
+            'name': 'Server %d' % i,
+            'description': 'A server',
+            'status': None,
+            'suspended': False,
+            'limits': {
+                'memory': 4096, 'swap': 0, 'disk': 20000, 'io': 500,
+                'cpu': 200, 'threads': None, 'oom_disabled': True},
+            'feature_limits': {'databases': 2, 'allocations': 3, 'backups': 5},
+            'user': 1,
+            'node': i % 7,
+            'allocation': i,
+            'nest': 1,
+            'egg': 3,
+            'container': {
+                'startup_command': 'java -Xms128M -jar server.jar',
+                'image': 'ghcr.io/pterodactyl/yolks:java_17',
+                'installed': 1,
+                'environment': {
+                    'SERVER_JARFILE': 'server.jar', 'VERSION': 'latest'}},
+            'updated_at': '2022-07-01T00:00:00+00:00',
+            'created_at': '2022-07-01T00:00:00+00:00'}}
+
+
+PAGE = json.dumps({
+    'object': 'list',
+    'data': [server(i) for i in range(100)],
+    'meta': {'pagination': {
+        'total': 100, 'count': 100, 'per_page': 100, 'current_page': 1,
+        'total_pages': 1, 'links': {}}}}).encode()
+
+STATS = json.dumps({'event': 'stats', 'args': [json.dumps({
+    'memory_bytes': 1234567890, 'memory_limit_bytes': 4294967296,
+    'cpu_absolute': 23.456, 'network': {'rx_bytes': 123456,
+                                        'tx_bytes': 654321},
+    'state': 'running', 'disk_bytes': 987654321, 'uptime': 123456})]})
+
+
+def best(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main() -> None:
+    for name in ('json', 'ujson', 'orjson'):
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            print(f'{name}: not installed')
+            continue
+
+        page = best(lambda: codec.loads(PAGE), 200)
+        stats = best(lambda: codec.loads(codec.loads(STATS)['args'][0]),
+                     20000)
+        print(f'{name}: server page ({len(PAGE)} B) {page * 1e6:.0f} us, '
+              f'stats frame {stats * 1e6:.2f} us')
+
+    # the stats path before the codec: a str join and two stdlib decodes
+    before = best(lambda: json.loads(''.join(json.loads(STATS)['args'])),
+                  20000)
+    print(f'previous stats path: {before * 1e6:.2f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Measures the request rate of RequestManager against a local stand-in panel.
+
+    python benchmarks/http_pool.py [--requests 2000] [--concurrency 10]
+    python benchmarks/http_pool.py --fresh-session
+
+``--fresh-session`` opens and closes a session for every request, which matches
+the behaviour before the session was pooled, for a before and after
+comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pytero.http import RequestManager  # noqa: E402
+
+
+SERVER = {'object': 'server', 'attributes': {'id': 1, 'name': 'x' * 20}}
+
+
+async def server(_: web.Request) -> web.Response:
+    return web.Response(text=json.dumps(SERVER),
+                        content_type='application/json')
+
+
+async def run(args: argparse.Namespace) -> None:
+    app = web.Application()
+    app.router.add_get('/api/application/servers/{id}/', server)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', args.port).start()
+
+    def manager() -> RequestManager:
+        return RequestManager('application', f'http://127.0.0.1:{args.port}',
+                              'key', rate_limit=False, retry=None,
+                              coalesce=False)
+
+    http = manager()
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int) -> None:
+        async with limit:
+            if not args.fresh_session:
+                await http.get(f'/servers/{i}')
+                return
+
+            fresh = manager()
+            try:
+                await fresh.get(f'/servers/{i}')
+            finally:
+                await fresh.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    mode = 'fresh session' if args.fresh_session else 'pooled session'
+    print(f'{mode}: {args.requests} requests in {elapsed:.2f}s, '
+          f'{args.requests / elapsed:.0f} req/s')
+
+    await http.close()
+    await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--fresh-session', action='store_true')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
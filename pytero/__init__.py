@@ -11,16 +11,25 @@ License: MIT
 # flake8: noqa
 
 from .app import PteroApp
+from .backups import *
+from .bulk import *
+from .cache import *
 from .client import PteroClient
+from .codec import *
 from .errors import *
-from .events import Emitter
+from .events import Emitter, EventExecutor, Subscription
 from .files import *
 from .http import RequestManager
 from .node import Node
+from .paginator import Paginator
 from .permissions import *
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
 from .schedules import Schedule
 from .servers import *
-from .shard import Shard
+from .shard import Shard, ShardManager
+from .stats import *
+from .sync import *
 from .types import *
 from .users import *
 
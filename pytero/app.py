@@ -8,8 +8,10 @@ https://your.pterodactyl.domain/account/api.
 
 # pylint: disable=R0904
 
+from .bulk import BulkExecutor
 from .http import RequestManager
 from .node import Node
+from .paginator import Paginator
 from .servers import AppServer
 from .types import Allocation, AppDatabase, DeployNodeOptions, \
     DeployServerOptions, Egg, FeatureLimits, Limits, Location, Nest, \
@@ -29,16 +31,64 @@ class PteroApp:
     key: :class:`str`
         The API key to use for HTTP requests. This can be either an
         application API key or a Client API key (as of Pterodactyl v1.8).
+    options: Any
+        Additional connection options passed to :class:`RequestManager`, such
+        as ``limit_per_host``, ``dns_ttl`` and ``keepalive_timeout``.
+
+    The interface keeps a pooled HTTP session open between requests. Use it
+    as an async context manager or call :meth:`close` when finished with it.
     """
 
-    def __init__(self, url: str, key: str) -> None:
+    def __init__(self, url: str, key: str, **options) -> None:
         self.url = url.removesuffix('/')
         self.key = key
-        self._http = RequestManager('application', self.url, key)
+        self._http = RequestManager('application', self.url, key, **options)
 
     def __repr__(self) -> str:
         return '<PteroApp>'
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes the HTTP session and any pooled connections."""
+        await self._http.close()
+
+    def bulk(
+        self,
+        *,
+        concurrency: int = 8,
+        per_node: int = None,
+        on_progress=None
+    ) -> BulkExecutor:
+        """Returns a :class:`BulkExecutor` for running many operations with
+        bounded concurrency, for example:
+
+        .. code:: python
+
+            bulk = app.bulk(concurrency=10, per_node=2)
+            for server in servers:
+                bulk.add(app.suspend_server, server.id, node=server.node_id)
+
+            async for result in bulk.run():
+                ...
+
+        concurrency: Optional[:class:`int`]
+            The maximum number of operations to run at once (default is
+            ``8``).
+        per_node: Optional[:class:`int`]
+            The maximum number of operations to run at once per node (default
+            is ``None``).
+        on_progress: Optional[Callable[[:class:`BulkExecutor`], Any]]
+            A function called after each operation completes (default is
+            ``None``).
+        """
+        return BulkExecutor(concurrency=concurrency, per_node=per_node,
+                            on_progress=on_progress)
+
     @property
     def event(self):
         """Returns the HTTP class event decorator for registering events to
@@ -51,7 +101,9 @@ class PteroApp:
         *,
         _filter: tuple[str, str] = None,
         include: list[str] = None,
-        sort: str = None
+        sort: str = None,
+        fetch_all: bool = False,
+        concurrency: int = 4
     ) -> list[User]:
         """Returns a list of users from the API with the given options if
         specified.
@@ -72,11 +124,40 @@ class PteroApp:
             supports:
             * id
             * uuid
+        fetch_all: Optional[:class:`bool`]
+            Whether to fetch every page instead of only the first (default is
+            ``False``).
+        concurrency: Optional[:class:`int`]
+            The maximum number of pages to fetch at once when ``fetch_all`` is
+            set (default is ``4``).
         """
+        if fetch_all:
+            return await self.iter_users(
+                _filter=_filter, include=include,
+                sort=sort).all(concurrency=concurrency)
+
         data = await self._http.get('/users', _filter=_filter, include=include,
                                     sort=sort)
         return [User(self, datum['attributes']) for datum in data['data']]
 
+    def iter_users(
+        self,
+        *,
+        per_page: int = None,
+        _filter: tuple[str, str] = None,
+        include: list[str] = None,
+        sort: str = None
+    ) -> Paginator[User]:
+        """Returns an async iterator over every user from the API, fetching
+        one page at a time. This takes the same options as :meth:`get_users`.
+
+        per_page: Optional[:class:`int`]
+            The number of users to fetch per page (default is ``None``).
+        """
+        return Paginator(self._http, '/users',
+                         lambda attrs: User(self, attrs), per_page=per_page,
+                         _filter=_filter, include=include, sort=sort)
+
     async def get_user(
         self,
         _id: int,
@@ -207,7 +288,9 @@ class PteroApp:
         *,
         _filter: tuple[str, str] = None,
         include: list[str] = None,
-        sort: str = None
+        sort: str = None,
+        fetch_all: bool = False,
+        concurrency: int = 4
     ) -> list[AppServer]:
         """Returns a list of servers from the API with the given options if
         specified.
@@ -233,12 +316,43 @@ class PteroApp:
             supports:
             * id
             * uuid
+        fetch_all: Optional[:class:`bool`]
+            Whether to fetch every page instead of only the first (default is
+            ``False``).
+        concurrency: Optional[:class:`int`]
+            The maximum number of pages to fetch at once when ``fetch_all`` is
+            set (default is ``4``).
         """
+        if fetch_all:
+            return await self.iter_servers(
+                _filter=_filter, include=include,
+                sort=sort).all(concurrency=concurrency)
+
         data = await self._http.get('/servers',
                                     _filter=_filter, include=include,
                                     sort=sort)
         return [AppServer(self, datum['attributes']) for datum in data['data']]
 
+    def iter_servers(
+        self,
+        *,
+        per_page: int = None,
+        _filter: tuple[str, str] = None,
+        include: list[str] = None,
+        sort: str = None
+    ) -> Paginator[AppServer]:
+        """Returns an async iterator over every server from the API, fetching
+        one page at a time. This takes the same options as
+        :meth:`get_servers`.
+
+        per_page: Optional[:class:`int`]
+            The number of servers to fetch per page (default is ``None``).
+        """
+        return Paginator(self._http, '/servers',
+                         lambda attrs: AppServer(self, attrs),
+                         per_page=per_page, _filter=_filter, include=include,
+                         sort=sort)
+
     async def get_server(
         self,
         _id: int,
@@ -575,12 +689,47 @@ class PteroApp:
         *,
         _filter: tuple[str, str] = None,
         include: list[str] = None,
-        sort: str = None
+        sort: str = None,
+        fetch_all: bool = False,
+        concurrency: int = 4
     ) -> list[Node]:
+        """Returns a list of nodes from the API with the given options if
+        specified.
+
+        fetch_all: Optional[:class:`bool`]
+            Whether to fetch every page instead of only the first (default is
+            ``False``).
+        concurrency: Optional[:class:`int`]
+            The maximum number of pages to fetch at once when ``fetch_all`` is
+            set (default is ``4``).
+        """
+        if fetch_all:
+            return await self.iter_nodes(
+                _filter=_filter, include=include,
+                sort=sort).all(concurrency=concurrency)
+
         data = await self._http.get('/nodes', _filter=_filter,
                                     include=include, sort=sort)
         return [Node(self, datum['attributes']) for datum in data['data']]
 
+    def iter_nodes(
+        self,
+        *,
+        per_page: int = None,
+        _filter: tuple[str, str] = None,
+        include: list[str] = None,
+        sort: str = None
+    ) -> Paginator[Node]:
+        """Returns an async iterator over every node from the API, fetching
+        one page at a time.
+
+        per_page: Optional[:class:`int`]
+            The number of nodes to fetch per page (default is ``None``).
+        """
+        return Paginator(self._http, '/nodes',
+                         lambda attrs: Node(self, attrs), per_page=per_page,
+                         _filter=_filter, include=include, sort=sort)
+
     async def get_node(
         self,
         _id: int,
@@ -662,10 +811,45 @@ class PteroApp:
         """
         return self._http.delete(f'/nodes/{node}/allocations/{_id}')
 
-    async def get_locations(self) -> list[Location]:
+    async def get_locations(
+        self,
+        *,
+        fetch_all: bool = False,
+        concurrency: int = 4
+    ) -> list[Location]:
+        """Returns a list of locations from the API.
+
+        fetch_all: Optional[:class:`bool`]
+            Whether to fetch every page instead of only the first (default is
+            ``False``).
+        concurrency: Optional[:class:`int`]
+            The maximum number of pages to fetch at once when ``fetch_all`` is
+            set (default is ``4``).
+        """
+        if fetch_all:
+            return await self.iter_locations().all(concurrency=concurrency)
+
         data = await self._http.get('/locations')
         return [Location(**datum['attributes']) for datum in data['data']]
 
+    def iter_locations(
+        self,
+        *,
+        per_page: int = None,
+        _filter: tuple[str, str] = None,
+        include: list[str] = None,
+        sort: str = None
+    ) -> Paginator[Location]:
+        """Returns an async iterator over every location from the API,
+        fetching one page at a time.
+
+        per_page: Optional[:class:`int`]
+            The number of locations to fetch per page (default is ``None``).
+        """
+        return Paginator(self._http, '/locations',
+                         lambda attrs: Location(**attrs), per_page=per_page,
+                         _filter=_filter, include=include, sort=sort)
+
     async def get_location(self, _id: int) -> Location:
         data = await self._http.get(f'/locations/{_id}')
         return Location(**data['attributes'])
@@ -696,10 +880,45 @@ class PteroApp:
     def delete_location(self, _id: int, /) -> None:
         return self._http.delete(f'/locations/{_id}')
 
-    async def get_nests(self) -> list[Nest]:
+    async def get_nests(
+        self,
+        *,
+        fetch_all: bool = False,
+        concurrency: int = 4
+    ) -> list[Nest]:
+        """Returns a list of nests from the API.
+
+        fetch_all: Optional[:class:`bool`]
+            Whether to fetch every page instead of only the first (default is
+            ``False``).
+        concurrency: Optional[:class:`int`]
+            The maximum number of pages to fetch at once when ``fetch_all`` is
+            set (default is ``4``).
+        """
+        if fetch_all:
+            return await self.iter_nests().all(concurrency=concurrency)
+
         data = await self._http.get('/nests')
         return [Nest(**datum['attributes']) for datum in data['data']]
 
+    def iter_nests(
+        self,
+        *,
+        per_page: int = None,
+        _filter: tuple[str, str] = None,
+        include: list[str] = None,
+        sort: str = None
+    ) -> Paginator[Nest]:
+        """Returns an async iterator over every nest from the API, fetching
+        one page at a time.
+
+        per_page: Optional[:class:`int`]
+            The number of nests to fetch per page (default is ``None``).
+        """
+        return Paginator(self._http, '/nests',
+                         lambda attrs: Nest(**attrs), per_page=per_page,
+                         _filter=_filter, include=include, sort=sort)
+
     async def get_nest(self, nest: int) -> Nest:
         data = await self._http.get(f'/nests/{nest}')
         return Nest(**data['attributes'])
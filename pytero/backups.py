@@ -0,0 +1,310 @@
+"""A fleet-wide backup orchestrator for Pytero, driven by websocket backup
+completion events with a polling fallback.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from statistics import median
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+from .bulk import BulkExecutor
+from .errors import RequestError
+from .servers import ClientServer
+from .types import Backup
+
+if TYPE_CHECKING:
+    from .client import PteroClient
+
+
+__all__ = ('BackupJob', 'BackupOrchestrator', 'BackupReport')
+
+
+@dataclass
+class BackupJob:
+    """The state of a backup run for a single server by a
+    :class:`BackupOrchestrator`.
+    """
+    identifier: str
+    node: str | None = None
+    backup: Backup | None = None
+    started: float | None = None
+    finished: float | None = None
+    detected_by: str | None = None
+    pruned: list[str] = field(default_factory=list)
+    error: Exception | None = None
+
+    def __repr__(self) -> str:
+        return f'<BackupJob identifier={self.identifier} ok={self.ok}>'
+
+    @property
+    def ok(self) -> bool:
+        """Returns ``True`` if the backup completed successfully."""
+        return self.error is None and self.finished is not None
+
+    @property
+    def timed_out(self) -> bool:
+        """Returns ``True`` if the backup did not complete in time."""
+        return isinstance(self.error, asyncio.TimeoutError)
+
+    @property
+    def elapsed(self) -> float:
+        """The number of seconds from starting the backup to its completion,
+        or until now if it has not completed.
+        """
+        if self.started is None:
+            return 0.0
+
+        return (self.finished or monotonic()) - self.started
+
+    @property
+    def size(self) -> int:
+        """The size of the completed backup in bytes."""
+        return self.backup.bytes if self.ok else 0
+
+
+@dataclass
+class BackupReport:
+    """The results of a :class:`BackupOrchestrator` run."""
+    jobs: list[BackupJob]
+    elapsed: float = 0.0
+    straggler_factor: float = 3.0
+
+    def __repr__(self) -> str:
+        return f'<BackupReport jobs={len(self.jobs)} ' \
+            f'failed={len(self.failed)}>'
+
+    @property
+    def succeeded(self) -> list[BackupJob]:
+        """The jobs that completed successfully."""
+        return [j for j in self.jobs if j.ok]
+
+    @property
+    def failed(self) -> list[BackupJob]:
+        """The jobs that failed or timed out."""
+        return [j for j in self.jobs if not j.ok]
+
+    @property
+    def stragglers(self) -> list[BackupJob]:
+        """The jobs that timed out or took longer than ``straggler_factor``
+        times the median backup duration.
+        """
+        durations = [j.elapsed for j in self.succeeded]
+        limit = median(durations) * self.straggler_factor \
+            if durations else float('inf')
+
+        return [j for j in self.jobs
+                if j.timed_out or (j.ok and j.elapsed > limit)]
+
+    def per_node(self) -> dict[str | None, dict[str, int | float]]:
+        """Returns a dict of the backup statistics for each node, including
+        the number of bytes backed up per second of wall time on the node.
+        """
+        nodes: dict[str | None, list[BackupJob]] = {}
+        for job in self.jobs:
+            nodes.setdefault(job.node, []).append(job)
+
+        res = {}
+        for node, jobs in nodes.items():
+            started = [j.started for j in jobs if j.started is not None]
+            finished = [j.finished for j in jobs if j.finished is not None]
+            wall = max(finished) - min(started) if finished else 0.0
+            size = sum(j.size for j in jobs)
+            res[node] = {
+                'jobs': len(jobs),
+                'failed': sum(1 for j in jobs if not j.ok),
+                'bytes': size,
+                'elapsed': wall,
+                'throughput': size / wall if wall else 0.0}
+
+        return res
+
+
+class BackupOrchestrator:
+    """Runs backups for many servers with a global and a per-node limit.
+    Completion is detected through the server's websocket ``backup completed``
+    event, falling back to polling :meth:`PteroClient.get_backup` at a slow
+    interval if the event is missed or the websocket is unavailable. Older
+    backups can then be pruned to a retention count.
+
+    client: :class:`PteroClient`
+        The client to make requests with.
+    concurrency: Optional[:class:`int`]
+        The maximum number of backups to run at once (default is ``10``).
+    per_node: Optional[:class:`int`]
+        The maximum number of backups to run at once on a single node
+        (default is ``2``).
+    keep: Optional[:class:`int`]
+        The number of successful backups to keep per server, including the
+        new one. Locked backups are never deleted (default is ``None``, no
+        pruning).
+    name: Optional[:class:`str`]
+        The name for the new backups (default is ``None``).
+    ignore_files: Optional[list[:class:`str`]]
+        The files to exclude from the new backups (default is ``None``).
+    poll_interval: Optional[:class:`float`]
+        The number of seconds between fallback status checks (default is
+        ``60``).
+    timeout: Optional[:class:`float`]
+        The number of seconds to wait for a backup to complete (default is
+        ``3600``).
+    auth_timeout: Optional[:class:`float`]
+        The number of seconds to wait for the websocket to authenticate before
+        relying on polling alone (default is ``10``).
+    straggler_factor: Optional[:class:`float`]
+        How many times longer than the median a backup must take to be
+        reported as a straggler (default is ``3``).
+    on_progress: Optional[Callable[[:class:`BackupJob`], Any]]
+        A function called after each backup completes or fails (default is
+        ``None``).
+    """
+
+    def __init__(
+        self,
+        client: 'PteroClient',
+        *,
+        concurrency: int = 10,
+        per_node: int | None = 2,
+        keep: int | None = None,
+        name: str | None = None,
+        ignore_files: list[str] | None = None,
+        poll_interval: float = 60.0,
+        timeout: float = 3600.0,
+        auth_timeout: float = 10.0,
+        straggler_factor: float = 3.0,
+        on_progress: Callable[[BackupJob], Any] = None
+    ) -> None:
+        if keep is not None and keep < 1:
+            raise ValueError('keep must be at least 1')
+
+        self._client = client
+        self.concurrency = concurrency
+        self.per_node = per_node
+        self.keep = keep
+        self.name = name
+        self.ignore_files = ignore_files
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.auth_timeout = auth_timeout
+        self.straggler_factor = straggler_factor
+        self.on_progress = on_progress
+
+    def __repr__(self) -> str:
+        return f'<BackupOrchestrator concurrency={self.concurrency} ' \
+            f'per_node={self.per_node}>'
+
+    async def _wait(self, job: BackupJob) -> None:
+        client = self._client
+        shard = client.create_shard(job.identifier)
+        completed: asyncio.Future = asyncio.get_running_loop().create_future()
+        authed = asyncio.Event()
+        seen: set[str | None] = set()
+
+        def on_complete(payload: dict[str, Any] | None) -> None:
+            uuid = payload.get('uuid') if payload else None
+            if job.backup is None:
+                seen.add(uuid)
+            elif uuid in (None, job.backup.uuid) and not completed.done():
+                completed.set_result('event')
+
+        shard.add_event('on_backup_complete', on_complete)
+        shard.add_event('on_auth_success', authed.set)
+        listener = asyncio.ensure_future(shard.launch())
+        try:
+            # the backup is only started once events can be received, unless
+            # the websocket fails and polling has to be relied on
+            auth = asyncio.ensure_future(authed.wait())
+            await asyncio.wait({auth, listener}, timeout=self.auth_timeout,
+                               return_when=asyncio.FIRST_COMPLETED)
+            auth.cancel()
+
+            job.started = monotonic()
+            job.backup = await client.create_backup(
+                job.identifier, name=self.name,
+                ignore_files=self.ignore_files)
+            if seen & {None, job.backup.uuid}:
+                completed.set_result('event')
+
+            deadline = job.started + self.timeout
+            while True:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(
+                        f'backup for {job.identifier} did not complete '
+                        f'within {self.timeout} seconds')
+
+                try:
+                    job.detected_by = await asyncio.wait_for(
+                        asyncio.shield(completed),
+                        min(self.poll_interval, remaining))
+                    break
+                except asyncio.TimeoutError:
+                    backup = await client.get_backup(job.identifier,
+                                                     job.backup.uuid)
+                    if backup.completed_at is not None:
+                        job.detected_by = 'poll'
+                        break
+        finally:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+
+        job.backup = await client.get_backup(job.identifier, job.backup.uuid)
+        job.finished = monotonic()
+        if not job.backup.is_successful:
+            raise RequestError(f'backup {job.backup.uuid} for '
+                               f'{job.identifier} failed')
+
+    async def _prune(self, job: BackupJob) -> None:
+        # retention has to see every backup, not just the first page
+        backups = await self._client.list_backups(job.identifier,
+                                                  fetch_all=True)
+        successful = sorted((b for b in backups if b.is_successful),
+                            key=lambda b: b.created_at, reverse=True)
+
+        for backup in successful[self.keep:]:
+            if backup.is_locked or backup.uuid == job.backup.uuid:
+                continue
+
+            await self._client.delete_backup(job.identifier, backup.uuid)
+            job.pruned.append(backup.uuid)
+
+    async def _run(self, job: BackupJob) -> BackupJob:
+        try:
+            await self._wait(job)
+            if self.keep is not None:
+                await self._prune(job)
+        except Exception as ex:  # pylint: disable=W0703
+            job.error = ex
+
+        return job
+
+    async def run(
+        self,
+        servers: Iterable[ClientServer | str],
+        /
+    ) -> BackupReport:
+        """Backs up each server and returns a report once every backup has
+        completed, failed or timed out.
+
+        servers: Iterable[:class:`ClientServer` | :class:`str`]
+            The servers to back up. Server identifiers have no node, so they
+            are only subject to the global limit.
+        """
+        start = monotonic()
+        jobs: list[BackupJob] = []
+        bulk = BulkExecutor(concurrency=self.concurrency,
+                            per_node=self.per_node)
+
+        for server in servers:
+            if isinstance(server, ClientServer):
+                job = BackupJob(server.identifier, server.node)
+            else:
+                job = BackupJob(server)
+
+            jobs.append(job)
+            bulk.add(self._run, job, node=job.node, key=job.identifier)
+
+        async for result in bulk.run():
+            if self.on_progress is not None:
+                self.on_progress(result.value)
+
+        return BackupReport(jobs, monotonic() - start, self.straggler_factor)
@@ -0,0 +1,216 @@
+"""A bulk operation executor for running many API calls with bounded
+concurrency in Pytero.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable
+from .errors import PteroAPIError
+
+
+__all__ = ('BulkExecutor', 'BulkResult')
+
+
+@dataclass
+class BulkResult:
+    """The result of a single operation run by a :class:`BulkExecutor`."""
+    index: int
+    key: Any
+    value: Any = None
+    error: Exception | None = None
+    elapsed: float = 0.0
+
+    def __repr__(self) -> str:
+        return f'<BulkResult index={self.index} ok={self.ok}>'
+
+    @property
+    def ok(self) -> bool:
+        """Returns ``True`` if the operation completed without an error."""
+        return self.error is None
+
+    @property
+    def details(self) -> list[dict[str, str]]:
+        """Returns the error details from the panel if the operation failed
+        with a :class:`PteroAPIError`, otherwise an empty list.
+        """
+        if isinstance(self.error, PteroAPIError):
+            return list(self.error)
+
+        return []
+
+
+@dataclass
+class _Operation:
+    func: Callable[..., Awaitable[Any]]
+    args: tuple
+    kwargs: dict[str, Any]
+    node: Hashable | None
+    key: Any
+
+
+class BulkExecutor:
+    """Runs many API operations concurrently with a global limit and an
+    optional limit per node, streaming the result of each operation as it
+    completes. A failed operation does not stop the others.
+
+    concurrency: Optional[:class:`int`]
+        The maximum number of operations to run at once (default is ``8``).
+    per_node: Optional[:class:`int`]
+        The maximum number of operations to run at once for a single node
+        (default is ``None``, no limit).
+    on_progress: Optional[Callable[[:class:`BulkExecutor`], Any]]
+        A function called after each operation completes (default is
+        ``None``).
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 8,
+        per_node: int | None = None,
+        on_progress: Callable[['BulkExecutor'], Any] = None
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+
+        self.concurrency = concurrency
+        self.per_node = per_node
+        self.on_progress = on_progress
+        self.completed = 0
+        self.failed = 0
+        self._ops: list[_Operation] = []
+        self._started: float | None = None
+        self._finished: float | None = None
+
+    def __repr__(self) -> str:
+        return f'<BulkExecutor total={self.total} completed={self.completed}>'
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    @property
+    def total(self) -> int:
+        """The number of operations added to the executor."""
+        return len(self._ops)
+
+    @property
+    def elapsed(self) -> float:
+        """The number of seconds the executor has been running for."""
+        if self._started is None:
+            return 0.0
+
+        return (self._finished or monotonic()) - self._started
+
+    @property
+    def throughput(self) -> float:
+        """The number of operations completed per second."""
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed else 0.0
+
+    @property
+    def progress(self) -> float:
+        """The fraction of operations completed, between ``0`` and ``1``."""
+        return self.completed / self.total if self.total else 1.0
+
+    def add(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        /,
+        *args,
+        node: Hashable = None,
+        key: Any = None,
+        **kwargs
+    ) -> None:
+        """Adds an operation to the executor.
+
+        func: Callable[..., Awaitable[Any]]
+            The API method to call, such as :meth:`PteroApp.suspend_server`.
+        args: Any
+            The positional arguments for the method.
+        node: Optional[Hashable]
+            The node the operation applies to, used for the per-node limit
+            (default is ``None``).
+        key: Optional[Any]
+            A value to identify the operation in its result (default is the
+            first positional argument).
+        kwargs: Any
+            The keyword arguments for the method.
+        """
+        if key is None and args:
+            key = args[0]
+
+        self._ops.append(_Operation(func, args, kwargs, node, key))
+
+    async def run(self) -> AsyncIterator[BulkResult]:
+        """Runs every operation and yields their results in the order they
+        complete. The operations that have not completed are cancelled when
+        the generator is closed, which breaking out of an ``async for`` loop
+        does not do by itself. To stop early, iterate inside
+        :func:`contextlib.aclosing`:
+
+        .. code:: python
+
+            async with aclosing(bulk.run()) as results:
+                async for result in results:
+                    if not result.ok:
+                        break
+        """
+        limit = asyncio.Semaphore(self.concurrency)
+        nodes: dict[Hashable, asyncio.Semaphore] = {}
+        self.completed = 0
+        self.failed = 0
+        self._started = monotonic()
+        self._finished = None
+
+        async def execute(index: int, op: _Operation) -> BulkResult:
+            node_limit = None
+            if self.per_node is not None and op.node is not None:
+                if (node_limit := nodes.get(op.node)) is None:
+                    node_limit = nodes[op.node] = \
+                        asyncio.Semaphore(self.per_node)
+
+                await node_limit.acquire()
+
+            try:
+                async with limit:
+                    start = monotonic()
+                    try:
+                        value = await op.func(*op.args, **op.kwargs)
+                    except Exception as ex:  # pylint: disable=W0703
+                        return BulkResult(index, op.key, error=ex,
+                                          elapsed=monotonic() - start)
+
+                    return BulkResult(index, op.key, value,
+                                      elapsed=monotonic() - start)
+            finally:
+                if node_limit is not None:
+                    node_limit.release()
+
+        tasks = [asyncio.ensure_future(execute(i, op))
+                 for i, op in enumerate(self._ops)]
+        try:
+            for future in asyncio.as_completed(tasks):
+                result = await future
+                self.completed += 1
+                if not result.ok:
+                    self.failed += 1
+
+                if self.on_progress is not None:
+                    self.on_progress(self)
+
+                yield result
+        finally:
+            self._finished = monotonic()
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def results(self) -> list[BulkResult]:
+        """Runs every operation and returns the results in the order the
+        operations were added.
+        """
+        res = [result async for result in self.run()]
+        res.sort(key=lambda r: r.index)
+        return res
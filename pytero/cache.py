@@ -0,0 +1,326 @@
+"""Caching utilities for Pytero."""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from time import monotonic
+from typing import Any, Callable, Hashable
+
+
+__all__ = ('CacheEntry', 'ListingCache', 'LRUCache', 'ResponseCache')
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires: float
+    size: int = 0
+    etag: str | None = None
+    path: str | None = None
+
+    def __repr__(self) -> str:
+        return f'<CacheEntry size={self.size} fresh={self.fresh}>'
+
+    @property
+    def fresh(self) -> bool:
+        return monotonic() < self.expires
+
+
+class LRUCache:
+    """A least-recently-used cache with per-entry expiry, bounded by the
+    number of entries and optionally by their total size in bytes.
+
+    max_entries: Optional[:class:`int`]
+        The maximum number of entries to keep (default is ``1024``).
+    max_bytes: Optional[:class:`int`]
+        The maximum total size of the entries in bytes (default is
+        ``None``, no size limit).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        max_bytes: int | None = None
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__} entries={len(self)} ' \
+            f'bytes={self.bytes}>'
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups that returned a fresh entry."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, int | float]:
+        """Returns a dict of the cache statistics."""
+        return {
+            'entries': len(self),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate}
+
+    def peek(self, key: Hashable, /) -> CacheEntry | None:
+        """Returns the entry for a key, even if it has expired, without
+        counting it as a hit or miss.
+        """
+        if (entry := self._entries.get(key)) is not None:
+            self._entries.move_to_end(key)
+
+        return entry
+
+    def get(self, key: Hashable, /) -> Any | None:
+        """Returns the value for a key if it has not expired, otherwise
+        ``None``.
+        """
+        entry = self._entries.get(key)
+        if entry is None or not entry.fresh:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float,
+        *,
+        size: int = 0,
+        **meta
+    ) -> CacheEntry:
+        """Stores a value for the given number of seconds and evicts the least
+        recently used entries if the cache is over its bounds.
+        """
+        self.pop(key)
+        entry = CacheEntry(value, monotonic() + ttl, size, **meta)
+        self._entries[key] = entry
+        self.bytes += size
+
+        while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+                and len(self._entries) > 1):
+            _, old = self._entries.popitem(last=False)
+            self.bytes -= old.size
+            self.evictions += 1
+
+        return entry
+
+    def pop(self, key: Hashable, /) -> CacheEntry | None:
+        """Removes and returns the entry for a key, if any."""
+        if (entry := self._entries.pop(key, None)) is not None:
+            self.bytes -= entry.size
+
+        return entry
+
+    def discard_if(
+        self,
+        predicate: Callable[[Hashable, CacheEntry], bool],
+        /
+    ) -> int:
+        """Removes every entry matching the predicate and returns the number
+        of entries removed.
+        """
+        keys = [k for k, e in self._entries.items() if predicate(k, e)]
+        for key in keys:
+            self.pop(key)
+
+        return len(keys)
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        self._entries.clear()
+        self.bytes = 0
+
+
+class ResponseCache(LRUCache):
+    """A cache for ``GET`` responses used by :class:`RequestManager`. Only
+    paths matching one of the TTL patterns are cached. Expired entries with an
+    ``ETag`` are revalidated with ``If-None-Match`` instead of being fetched
+    again, and any ``POST``, ``PATCH``, ``PUT`` or ``DELETE`` request
+    invalidates the cached entries under the same top-level resource.
+
+    ttls: Optional[dict[:class:`str`, :class:`float`]]
+        A dict of glob patterns for request paths (e.g. ``/nests*``) and the
+        number of seconds to cache matching responses for (default is
+        :attr:`DEFAULT_TTLS`). The first matching pattern is used.
+    max_entries: Optional[:class:`int`]
+        The maximum number of responses to keep (default is ``1024``).
+    max_bytes: Optional[:class:`int`]
+        The maximum total size of the response bodies in bytes (default is
+        ``8 MiB``).
+    """
+
+    DEFAULT_TTLS: dict[str, float] = {
+        '/nests*': 300.0,
+        '/locations*': 300.0,
+        '/nodes*': 60.0}
+
+    def __init__(
+        self,
+        ttls: dict[str, float] = None,
+        *,
+        max_entries: int = 1024,
+        max_bytes: int | None = 8 * 1024 * 1024
+    ) -> None:
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes)
+        self.ttls = dict(self.DEFAULT_TTLS if ttls is None else ttls)
+        self.revalidations = 0
+
+    def stats(self) -> dict[str, int | float]:
+        res = super().stats()
+        res['revalidations'] = self.revalidations
+        return res
+
+    def ttl_for(self, path: str, /) -> float | None:
+        """Returns the TTL for a request path, or ``None`` if it should not be
+        cached.
+        """
+        path = path.split('?')[0]
+        for pattern, ttl in self.ttls.items():
+            if fnmatchcase(path, pattern):
+                return ttl
+
+        return None
+
+    def revalidated(self, key: str, ttl: float, /) -> None:
+        """Marks an entry as fresh after the panel confirmed it is unchanged.
+        """
+        if (entry := self.peek(key)) is not None:
+            entry.expires = monotonic() + ttl
+            self.revalidations += 1
+
+    def invalidate(self, path: str, /) -> int:
+        """Removes the entries under the same top-level resource as the given
+        path and returns the number of entries removed.
+        """
+        root = '/' + path.split('?')[0].strip('/').split('/')[0]
+        return self.discard_if(
+            lambda _, e: e.path is not None and (
+                e.path == root or e.path.startswith(root + '/')
+                or e.path.startswith(root + '?')))
+
+
+class ListingCache:
+    """A cache for server directory listings used by :class:`Directory`. Each
+    server has its own LRU cache keyed by the normalized directory path.
+    Methods that change files invalidate the listings they affect, and a
+    listing that was requested before an invalidation is not stored.
+
+    ttl: Optional[:class:`float`]
+        The number of seconds to keep a listing for (default is ``30``).
+    max_entries: Optional[:class:`int`]
+        The maximum number of listings to keep per server (default is
+        ``256``).
+    """
+
+    def __init__(self, ttl: float = 30.0, *, max_entries: int = 256) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._servers: dict[str, LRUCache] = {}
+        self._generations: dict[str, int] = {}
+
+    def __repr__(self) -> str:
+        return f'<ListingCache servers={len(self._servers)}>'
+
+    @staticmethod
+    def normalize(path: str, /) -> str:
+        """Returns the normalized form of a directory path."""
+        parts = path.replace('\\', '/').split('/')
+        return '/' + '/'.join(p for p in parts if p and p != '.')
+
+    def stats(self) -> dict[str, int | float]:
+        """Returns a dict of the cache statistics for all servers."""
+        hits = sum(c.hits for c in self._servers.values())
+        misses = sum(c.misses for c in self._servers.values())
+        return {
+            'servers': len(self._servers),
+            'entries': sum(len(c) for c in self._servers.values()),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+
+    def generation(self, identifier: str, /) -> int:
+        """Returns a counter that changes whenever the listings for a server
+        are invalidated.
+        """
+        return self._generations.get(identifier, 0)
+
+    def get(self, identifier: str, path: str) -> Any | None:
+        """Returns the cached listing for a directory, if it is fresh."""
+        if (cache := self._servers.get(identifier)) is None:
+            return None
+
+        return cache.get(self.normalize(path))
+
+    def set(
+        self,
+        identifier: str,
+        path: str,
+        value: Any,
+        generation: int | None = None
+    ) -> None:
+        """Stores the listing for a directory. If ``generation`` is given and
+        the server's listings were invalidated since, the listing is dropped.
+        """
+        if generation is not None and \
+                generation != self.generation(identifier):
+            return
+
+        if (cache := self._servers.get(identifier)) is None:
+            cache = self._servers[identifier] = \
+                LRUCache(max_entries=self.max_entries)
+
+        cache.set(self.normalize(path), value, self.ttl)
+
+    def invalidate(
+        self,
+        identifier: str,
+        path: str,
+        *,
+        subtree: bool = False
+    ) -> int:
+        """Removes the listing for a directory, and optionally every listing
+        below it, and returns the number of listings removed.
+        """
+        self._generations[identifier] = self.generation(identifier) + 1
+        if (cache := self._servers.get(identifier)) is None:
+            return 0
+
+        path = self.normalize(path)
+        if not subtree:
+            return 1 if cache.pop(path) is not None else 0
+
+        prefix = path.rstrip('/') + '/'
+        return cache.discard_if(
+            lambda k, _: k == path or k.startswith(prefix))
+
+    def clear(self, identifier: str = None, /) -> None:
+        """Removes the listings for a server, or for every server."""
+        if identifier is None:
+            for key in self._servers:
+                self._generations[key] = self.generation(key) + 1
+
+            self._servers.clear()
+        else:
+            self._generations[identifier] = self.generation(identifier) + 1
+            self._servers.pop(identifier, None)
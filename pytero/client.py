@@ -7,15 +7,18 @@ https://your.pterodactyl.domain/account/api.
 
 # pylint: disable=R0904
 
-from typing import Any
-from .files import Directory, File
+from typing import Any, Callable
+from .backups import BackupOrchestrator
+from .bulk import BulkExecutor
+from .files import Directory, File, download_ranges
 from .http import RequestManager
+from .paginator import Paginator
 from .permissions import Permissions
 from .types import APIKey, Activity, Backup, ClientDatabase, ClientVariable, \
     NetworkAllocation, SSHKey, Statistics, Task, WebSocketAuth
 from .schedules import Schedule
 from .servers import ClientServer
-from .shard import Shard
+from .shard import Shard, ShardManager
 from .users import Account, SubUser
 
 
@@ -31,16 +34,81 @@ class PteroClient:
     key: :class:`str`
         The API key to use for HTTP requests. This must be a client API key,
         NOT an application API key.
+    options: Any
+        Additional connection options passed to :class:`RequestManager`, such
+        as ``limit_per_host``, ``dns_ttl`` and ``keepalive_timeout``.
+
+    The interface keeps a pooled HTTP session open between requests. Use it
+    as an async context manager or call :meth:`close` when finished with it.
     """
 
-    def __init__(self, url: str, key: str) -> None:
+    def __init__(self, url: str, key: str, **options) -> None:
         self.url = url.removesuffix('/')
         self.key = key
-        self._http = RequestManager('client', self.url, key)
+        self._http = RequestManager('client', self.url, key, **options)
 
     def __repr__(self) -> str:
         return '<PteroClient>'
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes the HTTP session and any pooled connections."""
+        await self._http.close()
+
+    def backups(self, **options) -> BackupOrchestrator:
+        """Returns a :class:`BackupOrchestrator` for backing up many servers,
+        for example:
+
+        .. code:: python
+
+            orchestrator = client.backups(concurrency=20, per_node=2, keep=7)
+            report = await orchestrator.run(await client.get_servers())
+            for job in report.stragglers:
+                ...
+
+        options: Any
+            The options passed to :class:`BackupOrchestrator`.
+        """
+        return BackupOrchestrator(self, **options)
+
+    def bulk(
+        self,
+        *,
+        concurrency: int = 8,
+        per_node: int = None,
+        on_progress=None
+    ) -> BulkExecutor:
+        """Returns a :class:`BulkExecutor` for running many operations with
+        bounded concurrency, for example:
+
+        .. code:: python
+
+            bulk = client.bulk(concurrency=10, per_node=2)
+            for server in servers:
+                bulk.add(client.send_server_power, server.identifier,
+                         'restart', node=server.node)
+
+            async for result in bulk.run():
+                ...
+
+        concurrency: Optional[:class:`int`]
+            The maximum number of operations to run at once (default is
+            ``8``).
+        per_node: Optional[:class:`int`]
+            The maximum number of operations to run at once per node (default
+            is ``None``).
+        on_progress: Optional[Callable[[:class:`BulkExecutor`], Any]]
+            A function called after each operation completes (default is
+            ``None``).
+        """
+        return BulkExecutor(concurrency=concurrency, per_node=per_node,
+                            on_progress=on_progress)
+
     @property
     def event(self):
         """A decorator shorthand function for :meth:`RequestManager#event`."""
@@ -110,10 +178,46 @@ class PteroClient:
                                   'password_confirmation': new
                               })
 
-    async def get_account_activities(self) -> list[Activity]:
+    async def get_account_activities(
+        self,
+        *,
+        fetch_all: bool = False,
+        concurrency: int = 4
+    ) -> list[Activity]:
+        """Returns a list of activity logs for the account.
+
+        fetch_all: Optional[:class:`bool`]
+            Whether to fetch every page instead of only the first (default is
+            ``False``).
+        concurrency: Optional[:class:`int`]
+            The maximum number of pages to fetch at once when ``fetch_all`` is
+            set (default is ``4``).
+        """
+        if fetch_all:
+            return await self.iter_account_activities().all(
+                concurrency=concurrency)
+
         data = await self._http.get('/account/activity')
         return [Activity(**datum['attributes']) for datum in data['data']]
 
+    def iter_account_activities(
+        self,
+        *,
+        per_page: int = None,
+        _filter: tuple[str, str] = None,
+        include: list[str] = None,
+        sort: str = None
+    ) -> Paginator[Activity]:
+        """Returns an async iterator over every activity log for the account,
+        fetching one page at a time.
+
+        per_page: Optional[:class:`int`]
+            The number of activities to fetch per page (default is ``None``).
+        """
+        return Paginator(self._http, '/account/activity',
+                         lambda attrs: Activity(**attrs), per_page=per_page,
+                         _filter=_filter, include=include, sort=sort)
+
     async def get_api_keys(self) -> list[APIKey]:
         data = await self._http.get('/account/api-keys')
         return [APIKey(**datum['attributes']) for datum in data['data']]
@@ -147,11 +251,47 @@ class PteroClient:
         return self._http.post('/account/ssh-keys/remove',
                                {'fingerprint': fingerprint})
 
-    async def get_servers(self) -> list[ClientServer]:
+    async def get_servers(
+        self,
+        *,
+        fetch_all: bool = False,
+        concurrency: int = 4
+    ) -> list[ClientServer]:
+        """Returns a list of servers available to the account.
+
+        fetch_all: Optional[:class:`bool`]
+            Whether to fetch every page instead of only the first (default is
+            ``False``).
+        concurrency: Optional[:class:`int`]
+            The maximum number of pages to fetch at once when ``fetch_all`` is
+            set (default is ``4``).
+        """
+        if fetch_all:
+            return await self.iter_servers().all(concurrency=concurrency)
+
         data = await self._http.get('/')
         return [ClientServer(self._http, datum['attributes'])
                 for datum in data['data']]
 
+    def iter_servers(
+        self,
+        *,
+        per_page: int = None,
+        _filter: tuple[str, str] = None,
+        include: list[str] = None,
+        sort: str = None
+    ) -> Paginator[ClientServer]:
+        """Returns an async iterator over every server available to the
+        account, fetching one page at a time.
+
+        per_page: Optional[:class:`int`]
+            The number of servers to fetch per page (default is ``None``).
+        """
+        return Paginator(self._http, '/',
+                         lambda attrs: ClientServer(self._http, attrs),
+                         per_page=per_page, _filter=_filter, include=include,
+                         sort=sort)
+
     async def get_server(self, identifier: str, /) -> ClientServer:
         data = await self._http.get(f'/servers/{identifier}')
         return ClientServer(self._http, data['attributes'])
@@ -160,18 +300,72 @@ class PteroClient:
         data = await self._http.get(f'/servers/{identifier}/websocket')
         return WebSocketAuth(**data['data'])
 
-    def create_shard(self, identifier: str, /) -> Shard:
-        return Shard(self._http, identifier)
+    def create_shard(self, identifier: str, /, **options) -> Shard:
+        return Shard(self._http, identifier, **options)
+
+    def create_shard_manager(self, **options) -> ShardManager:
+        """Returns a :class:`ShardManager` for connecting to the websockets of
+        many servers at once.
+
+        options: Any
+            The options passed to :class:`ShardManager`, such as
+            ``max_connecting`` and ``refresh_rate``, and to each
+            :class:`Shard`.
+        """
+        return ShardManager(self._http, **options)
 
     async def get_server_resources(self, identifier: str, /) -> Statistics:
         data = await self._http.get(f'/servers/{identifier}/resources')
         return Statistics(**data['attributes'])
 
-    async def get_server_activities(self,
-                                    identifier: str, /) -> list[Activity]:
+    async def get_server_activities(
+        self,
+        identifier: str,
+        /,
+        *,
+        fetch_all: bool = False,
+        concurrency: int = 4
+    ) -> list[Activity]:
+        """Returns a list of activity logs for a server.
+
+        identifier: :class:`str`
+            The identifier of the server.
+        fetch_all: Optional[:class:`bool`]
+            Whether to fetch every page instead of only the first (default is
+            ``False``).
+        concurrency: Optional[:class:`int`]
+            The maximum number of pages to fetch at once when ``fetch_all`` is
+            set (default is ``4``).
+        """
+        if fetch_all:
+            return await self.iter_server_activities(identifier).all(
+                concurrency=concurrency)
+
         data = await self._http.get(f'/servers/{identifier}/activity')
         return [Activity(**datum['attributes']) for datum in data['data']]
 
+    def iter_server_activities(
+        self,
+        identifier: str,
+        /,
+        *,
+        per_page: int = None,
+        _filter: tuple[str, str] = None,
+        include: list[str] = None,
+        sort: str = None
+    ) -> Paginator[Activity]:
+        """Returns an async iterator over every activity log for a server,
+        fetching one page at a time.
+
+        identifier: :class:`str`
+            The identifier of the server.
+        per_page: Optional[:class:`int`]
+            The number of activities to fetch per page (default is ``None``).
+        """
+        return Paginator(self._http, f'/servers/{identifier}/activity',
+                         lambda attrs: Activity(**attrs), per_page=per_page,
+                         _filter=_filter, include=include, sort=sort)
+
     def send_server_command(self, identifier: str, command: str) -> None:
         return self._http.post(f'/servers/{identifier}/command',
                                {'command': command})
@@ -435,10 +629,54 @@ class PteroClient:
     def remove_server_subuser(self, identifier: str, uuid: str) -> None:
         return self._http.delete(f'/servers/{identifier}/users/{uuid}')
 
-    async def list_backups(self, identifier: str, /) -> list[Backup]:
+    async def list_backups(
+        self,
+        identifier: str,
+        /,
+        *,
+        fetch_all: bool = False,
+        concurrency: int = 4
+    ) -> list[Backup]:
+        """Returns a list of backups for a server.
+
+        identifier: :class:`str`
+            The identifier of the server.
+        fetch_all: Optional[:class:`bool`]
+            Whether to fetch every page instead of only the first (default is
+            ``False``).
+        concurrency: Optional[:class:`int`]
+            The maximum number of pages to fetch at once when ``fetch_all`` is
+            set (default is ``4``).
+        """
+        if fetch_all:
+            return await self.iter_backups(identifier).all(
+                concurrency=concurrency)
+
         data = await self._http.get(f'/servers/{identifier}/backups')
         return [Backup(**datum['attributes']) for datum in data['data']]
 
+    def iter_backups(
+        self,
+        identifier: str,
+        /,
+        *,
+        per_page: int = None,
+        _filter: tuple[str, str] = None,
+        include: list[str] = None,
+        sort: str = None
+    ) -> Paginator[Backup]:
+        """Returns an async iterator over every backup for a server, fetching
+        one page at a time.
+
+        identifier: :class:`str`
+            The identifier of the server.
+        per_page: Optional[:class:`int`]
+            The number of backups to fetch per page (default is ``None``).
+        """
+        return Paginator(self._http, f'/servers/{identifier}/backups',
+                         lambda attrs: Backup(**attrs), per_page=per_page,
+                         _filter=_filter, include=include, sort=sort)
+
     async def create_backup(self, identifier: str, *, name: str | None = None,
                             ignore_files: list[str] | None = None,
                             locked: bool = False) -> Backup:
@@ -459,6 +697,63 @@ class PteroClient:
 
         return data['attributes']['url']
 
+    async def download_backup(
+        self,
+        identifier: str,
+        uuid: str,
+        dest: str,
+        /,
+        *,
+        parts: int = 4,
+        segment_size: int = 8 * 1024 * 1024,
+        chunk_size: int = 65536,
+        retries: int = 3,
+        verify: bool = True,
+        progress: Callable[[int, int | None], Any] = None
+    ) -> None:
+        """Downloads a backup to a local path, fetching byte ranges over
+        several connections at once into a preallocated file. Each range is
+        retried and resumed on its own, and the data is hashed in order as it
+        arrives so the checksum is verified without reading the file again.
+        The data is written to ``<dest>.part`` and moved to ``dest`` once
+        complete.
+
+        identifier: :class:`str`
+            The identifier of the server.
+        uuid: :class:`str`
+            The UUID of the backup.
+        dest: :class:`str`
+            The local path to save the backup to. This must not exist.
+        parts: Optional[:class:`int`]
+            The number of ranges to download at once (default is ``4``).
+        segment_size: Optional[:class:`int`]
+            The number of bytes in each range (default is ``8 MiB``). At most
+            ``parts * 2`` ranges are kept in memory for hashing.
+        chunk_size: Optional[:class:`int`]
+            The number of bytes to read at a time (default is ``65536``).
+        retries: Optional[:class:`int`]
+            The number of times to retry or resume each range (default is
+            ``3``).
+        verify: Optional[:class:`bool`]
+            Whether to verify the download against the backup checksum
+            (default is ``True``).
+        progress: Optional[Callable[[:class:`int`, :class:`int` | None], Any]]
+            A function called with the bytes downloaded so far and the total
+            size, if known (default is ``None``).
+        """
+        backup = await self.get_backup(identifier, uuid)
+        url = await self.get_backup_download_url(identifier, uuid)
+
+        await download_ranges(
+            self._http, url, dest,
+            lambda: self.get_backup_download_url(identifier, uuid),
+            parts=parts,
+            segment_size=segment_size,
+            chunk_size=chunk_size,
+            retries=retries,
+            checksum=backup.checksum if verify else None,
+            progress=progress)
+
     def delete_backup(self, identifier: str, uuid: str) -> None:
         return self._http.delete(f'/servers/{identifier}/backups/{uuid}')
 
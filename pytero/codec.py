@@ -0,0 +1,80 @@
+"""JSON codecs for Pytero. The fastest installed JSON library is used by
+default, falling back to the standard library.
+"""
+
+import json
+from typing import Any, Callable
+
+
+__all__ = ('Codec', 'get_codec')
+
+
+class Codec:
+    """A JSON encoder and decoder pair. Encoding always returns bytes and
+    decoding accepts bytes or strings, so response bodies can be decoded
+    without converting them to strings first.
+
+    name: :class:`str`
+        The name of the JSON library.
+    dumps: Callable[[Any], :class:`bytes`]
+        The function for encoding an object.
+    loads: Callable[[:class:`bytes` | :class:`str`], Any]
+        The function for decoding an object.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        dumps: Callable[[Any], bytes],
+        loads: Callable[[bytes | str], Any]
+    ) -> None:
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self) -> str:
+        return f'<Codec name={self.name}>'
+
+
+def _orjson() -> Codec:
+    import orjson  # pylint: disable=C0415
+
+    return Codec('orjson', orjson.dumps, orjson.loads)
+
+
+def _ujson() -> Codec:
+    import ujson  # pylint: disable=C0415
+
+    return Codec('ujson', lambda obj: ujson.dumps(obj).encode(), ujson.loads)
+
+
+def _json() -> Codec:
+    return Codec('json', lambda obj: json.dumps(obj).encode(), json.loads)
+
+
+_CODECS: dict[str, Callable[[], Codec]] = {
+    'orjson': _orjson,
+    'ujson': _ujson,
+    'json': _json}
+
+
+def get_codec(name: str = 'auto', /) -> Codec:
+    """Returns the codec for a JSON library. With ``auto``, this returns the
+    first installed library out of ``orjson``, ``ujson`` and ``json``.
+
+    name: Optional[:class:`str`]
+        The name of the JSON library (default is ``auto``).
+    """
+    if name != 'auto':
+        if name not in _CODECS:
+            raise KeyError(f"unknown json codec '{name}'")
+
+        return _CODECS[name]()
+
+    for factory in _CODECS.values():
+        try:
+            return factory()
+        except ImportError:
+            continue
+
+    return _json()
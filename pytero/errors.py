@@ -7,6 +7,7 @@ __all__ = (
     'RangeError',
     'RequestError',
     'ShardError',
+    'SlowListenerWarning',
     'ValidationError'
 )
 
@@ -65,5 +66,10 @@ class ShardError(Exception):
     """Raised when a shard authentication or connection fails"""
 
 
+class SlowListenerWarning(RuntimeWarning):
+    """Warned when a synchronous event callback runs for longer than the slow
+    threshold of its executor"""
+
+
 class ValidationError(Exception):
     """Errors received when a request validation fails"""
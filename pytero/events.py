@@ -2,24 +2,309 @@
 and websocket interactions/events.
 """
 
+import asyncio
+import warnings
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, \
+    ThreadPoolExecutor
+from functools import partial
 from inspect import iscoroutinefunction
-from typing import Callable
-from .errors import EventError
+from time import perf_counter
+from typing import Any, Callable
+from weakref import WeakKeyDictionary
+from .errors import EventError, SlowListenerWarning
 
 
-__all__ = ('Emitter',)
+__all__ = ('Emitter', 'EventExecutor', 'Subscription')
+
+MODES = ('inline', 'thread', 'process')
+
+# (is coroutine function, callback, once, mode)
+_Slot = tuple[bool, Callable[..., None], bool, str]
+
+
+def _unpack(args: tuple[Any, ...]) -> Any:
+    if len(args) == 1:
+        return args[0]
+
+    return args or None
+
+
+def _timed(
+    func: Callable[..., None],
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any]
+) -> float:
+    # runs in the worker, so only the callback itself is timed
+    start = perf_counter()
+    func(*args, **kwargs)
+    return perf_counter() - start
+
+
+class EventExecutor:
+    """Runs synchronous event callbacks added with the ``thread`` or
+    ``process`` mode off the event loop, and warns about slow synchronous
+    callbacks with a :class:`SlowListenerWarning`. A warning is given the
+    first time a callback exceeds ``slow_threshold`` and whenever it becomes
+    slower than before. The pools are created when first used and shared by
+    every emitter using the executor.
+
+    Callbacks run in the ``process`` mode, and their arguments, must be
+    picklable, so they have to be defined at the top level of a module.
+
+    max_threads: Optional[:class:`int`]
+        The number of worker threads (default is ``None``, the
+        :class:`ThreadPoolExecutor` default).
+    max_processes: Optional[:class:`int`]
+        The number of worker processes (default is ``None``, the number of
+        CPUs).
+    max_pending: Optional[:class:`int`]
+        The maximum number of callbacks queued or running in the pools at
+        once. Emitting an event waits for space beyond that (default is
+        ``64``).
+    slow_threshold: Optional[:class:`float`]
+        The number of seconds a synchronous callback can run for before it is
+        reported (default is ``0.1``).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_threads: int = None,
+        max_processes: int = None,
+        max_pending: int = 64,
+        slow_threshold: float = 0.1
+    ) -> None:
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+        self._pending: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # weak, so that removed listeners are not kept alive for their timings
+        self._worst: WeakKeyDictionary[Callable[..., None], float] = \
+            WeakKeyDictionary()
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self.max_pending = max_pending
+        self.slow_threshold = slow_threshold
+        self.queued = 0
+        self.slow_calls = 0
+
+    def __repr__(self) -> str:
+        return f'<EventExecutor queued={self.queued} ' \
+            f'slow_calls={self.slow_calls}>'
+
+    def _pool(self, mode: str) -> Executor:
+        if mode == 'thread':
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(
+                    self.max_threads, thread_name_prefix='pytero-events')
+
+            return self._threads
+
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(self.max_processes)
+
+        return self._processes
+
+    async def run(
+        self,
+        mode: str,
+        func: Callable[..., None],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any]
+    ) -> float:
+        """Runs a callback in the pool for the mode and returns the number of
+        seconds it ran for.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = asyncio.Semaphore(self.max_pending)
+
+        self.queued += 1
+        try:
+            async with self._pending:
+                return await loop.run_in_executor(
+                    self._pool(mode), partial(_timed, func, args, kwargs))
+        finally:
+            self.queued -= 1
+
+    def check(
+        self,
+        name: str,
+        func: Callable[..., None],
+        elapsed: float
+    ) -> None:
+        """Warns if a callback for an event ran for longer than the slow
+        threshold, and longer than any of its previous calls.
+        """
+        if elapsed <= self.slow_threshold:
+            return
+
+        self.slow_calls += 1
+        try:
+            if elapsed <= self._worst.get(func, 0.0):
+                return
+
+            self._worst[func] = elapsed
+        except TypeError:
+            # callables that cannot be weakly referenced are always reported
+            pass
+
+        label = getattr(func, '__qualname__', repr(func))
+        warnings.warn(
+            f"slow listener {label} for '{name}' ran for "
+            f'{elapsed * 1000:.1f} ms (threshold '
+            f'{self.slow_threshold * 1000:.1f} ms)',
+            SlowListenerWarning, stacklevel=3)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shuts down the pools. They are recreated if used again."""
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown(wait)
+
+        self._threads = self._processes = None
+
+
+_default = EventExecutor()
+
+
+class Subscription:
+    """An async iterator over the emissions of an event, returned by
+    :meth:`Emitter.subscribe`. Each item is the single argument of the event,
+    a tuple if it has several arguments, or ``None`` if it has none:
+
+    .. code:: python
+
+        async with shard.subscribe('on_output') as lines:
+            async for line in lines:
+                ...
+
+    If the items are not consumed fast enough, the oldest are dropped and
+    counted in :attr:`dropped`. Iteration ends once :meth:`close` is called.
+    """
+
+    def __init__(self, emitter: 'Emitter', name: str, maxsize: int) -> None:
+        self._emitter = emitter
+        self._queue: deque[Any] = deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+        self.name = name
+        self.closed = False
+        self.dropped = 0
+
+    def __repr__(self) -> str:
+        return f'<Subscription name={self.name} queued={len(self._queue)}>'
+
+    def __aiter__(self) -> 'Subscription':
+        return self
+
+    async def __anext__(self) -> Any:
+        while not self._queue:
+            if self.closed:
+                raise StopAsyncIteration
+
+            self._ready.clear()
+            await self._ready.wait()
+
+        return self._queue.popleft()
+
+    async def __aenter__(self) -> 'Subscription':
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        self.close()
+
+    def _push(self, *args) -> None:
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+
+        self._queue.append(_unpack(args))
+        self._ready.set()
+
+    def close(self) -> None:
+        """Stops receiving the event. Items that are already queued are still
+        returned by the iterator.
+        """
+        if not self.closed:
+            self.closed = True
+            self._emitter._discard(self.name, self._push)
+            self._ready.set()
 
 
 class Emitter:
-    """Events emitter manager for Pytero"""
+    """Events emitter manager for Pytero. An event can have several callback
+    functions, which are called in the order they were added.
+
+    Synchronous callbacks run on the event loop by default, which blocks
+    everything else in the process while they run. Callbacks that block, such
+    as those writing to a file or database, can be added with the ``thread``
+    mode to run in a thread pool, and CPU-heavy ones with the ``process`` mode
+    to run in a process pool. Emitting the event still waits for them.
+
+    executor: Optional[:class:`EventExecutor`]
+        The executor for callbacks that do not run inline (default is
+        ``None``, an executor shared by every emitter).
+    """
 
-    def __init__(self) -> None:
-        self._slots: dict[str, tuple[bool, Callable[..., None]]] = {}
+    def __init__(self, executor: EventExecutor = None) -> None:
+        # replaced rather than mutated, so emitting never copies them
+        self._slots: dict[str, tuple[_Slot, ...]] = {}
+        self.executor = executor or _default
 
     def __repr__(self) -> str:
         return f'<Emitter events={len(self._slots)}>'
 
-    def add_event(self, name: str, slot: Callable[..., None]) -> None:
+    def _add(
+        self,
+        name: str,
+        slot: Callable[..., None],
+        once: bool,
+        mode: str = 'inline'
+    ) -> None:
+        if not callable(slot):
+            raise TypeError('event slot is not a function')
+
+        if mode not in MODES:
+            raise ValueError(f"invalid listener mode '{mode}'")
+
+        coro = iscoroutinefunction(slot)
+        if coro and mode != 'inline':
+            raise ValueError('asynchronous event slots can only run inline')
+
+        self._slots[name] = self._slots.get(name, ()) + (
+            (coro, slot, once, mode),)
+
+    def _pop(self, name: str, index: int) -> None:
+        slots = self._slots[name]
+        if slots := slots[:index] + slots[index + 1:]:
+            self._slots[name] = slots
+        else:
+            del self._slots[name]
+
+    def _discard(self, name: str, slot: Callable[..., None]) -> bool:
+        for i, (_, func, *_) in enumerate(self._slots.get(name, ())):
+            if func == slot:
+                self._pop(name, i)
+                return True
+
+        return False
+
+    def _take(self, name: str, slot: _Slot) -> bool:
+        for i, entry in enumerate(self._slots.get(name, ())):
+            if entry is slot:
+                self._pop(name, i)
+                return True
+
+        return False
+
+    def add_event(
+        self,
+        name: str,
+        slot: Callable[..., None],
+        *,
+        mode: str = 'inline'
+    ) -> None:
         """Adds a callback function for a specified event. Note that the
         function can be synchronous or asynchronous as both will be handled
         when emitted.
@@ -28,19 +313,51 @@ class Emitter:
             The name of the event.
         slot: Callable[..., None]
             The callback function.
+        mode: Optional[:class:`str`]
+            Where a synchronous callback runs: ``inline`` on the event loop,
+            ``thread`` in a thread pool or ``process`` in a process pool
+            (default is ``inline``).
         """
-        if not callable(slot):
-            raise TypeError('event slot is not a function')
+        self._add(name, slot, False, mode)
+
+    def once(
+        self,
+        name: str,
+        slot: Callable[..., None],
+        *,
+        mode: str = 'inline'
+    ) -> None:
+        """Adds a callback function for a specified event that is removed
+        after it is called once.
 
-        self._slots[name] = (iscoroutinefunction(slot), slot)
+        name: :class:`str`
+            The name of the event.
+        slot: Callable[..., None]
+            The callback function.
+        mode: Optional[:class:`str`]
+            Where a synchronous callback runs, as for :meth:`add_event`
+            (default is ``inline``).
+        """
+        self._add(name, slot, True, mode)
 
-    def remove_event(self, name: str, /) -> None:
-        """Removes a callback function for a specified event.
+    def remove_event(
+        self,
+        name: str,
+        slot: Callable[..., None] = None,
+        /
+    ) -> None:
+        """Removes a callback function for a specified event, or every
+        callback function for the event if none is given.
 
         name: :class:`str`
             The name of the event.
+        slot: Optional[Callable[..., None]]
+            The callback function to remove (default is ``None``).
         """
-        del self._slots[name]
+        if slot is None:
+            del self._slots[name]
+        elif not self._discard(name, slot):
+            raise KeyError(name)
 
     def has_event(self, name: str, /) -> bool:
         """Returns ``True`` if the specified event has a callback function.
@@ -54,8 +371,60 @@ class Emitter:
         """Clears all the events and callback functions."""
         self._slots.clear()
 
+    async def wait_for(
+        self,
+        name: str,
+        /,
+        predicate: Callable[..., bool] = None,
+        timeout: float = None
+    ) -> Any:
+        """Waits for an event to be emitted and returns its argument, a tuple
+        if it has several arguments, or ``None`` if it has none. Raises
+        :class:`asyncio.TimeoutError` if the timeout is reached first.
+
+        name: :class:`str`
+            The name of the event.
+        predicate: Optional[Callable[..., :class:`bool`]]
+            A function called with the event arguments that returns ``True``
+            for the emission to wait for (default is ``None``, the first).
+        timeout: Optional[:class:`float`]
+            The maximum number of seconds to wait (default is ``None``).
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        def waiter(*args) -> None:
+            if future.done():
+                return
+
+            try:
+                if predicate is None or predicate(*args):
+                    future.set_result(_unpack(args))
+            except Exception as ex:  # pylint: disable=W0703
+                future.set_exception(ex)
+
+        self._add(name, waiter, False)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._discard(name, waiter)
+
+    def subscribe(self, name: str, /, maxsize: int = 100) -> Subscription:
+        """Returns a :class:`Subscription` to iterate over the emissions of an
+        event with ``async for``.
+
+        name: :class:`str`
+            The name of the event.
+        maxsize: Optional[:class:`int`]
+            The maximum number of emissions to hold before dropping the oldest
+            (default is ``100``).
+        """
+        subscription = Subscription(self, name, maxsize)
+        self._add(name, subscription._push, False)
+        return subscription
+
     async def emit_event(self, name: str, *args, **kwargs) -> None:
-        """Emits an event callback with the given arguments.
+        """Emits an event callback with the given arguments. Every callback
+        function is called, even if one of them fails.
 
         name: :class:`str`
             The name of the event.
@@ -64,11 +433,34 @@ class Emitter:
         kwargs: Any
             A dict of arguments to be passed on to the event callback.
         """
-        if slot := self._slots.get(name):
+        if (slots := self._slots.get(name)) is None:
+            return
+
+        error = None
+        for slot in slots:
+            coro, func, once, mode = slot
+            # removed before it runs, and skipped if another emission that
+            # was interleaved with this one already took it
+            if once and not self._take(name, slot):
+                continue
+
             try:
-                if slot[0]:
-                    await slot[1](*args, **kwargs)
+                if coro:
+                    await func(*args, **kwargs)
+                    continue
+
+                if mode == 'inline':
+                    start = perf_counter()
+                    func(*args, **kwargs)
+                    elapsed = perf_counter() - start
                 else:
-                    slot[1](*args, **kwargs)
-            except Exception as ex:
-                raise EventError(f'failed to run event: {ex}') from ex
+                    elapsed = await self.executor.run(mode, func, args,
+                                                      kwargs)
+
+                if elapsed > self.executor.slow_threshold:
+                    self.executor.check(name, func, elapsed)
+            except Exception as ex:  # pylint: disable=W0703
+                error = error or ex
+
+        if error is not None:
+            raise EventError(f'failed to run event: {error}') from error
@@ -1,8 +1,376 @@
-from typing import Any, Optional
+import asyncio
+import hashlib
+import os
+import posixpath
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from time import monotonic
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, \
+    Iterable, Optional
+from urllib.parse import quote
+from aiohttp import ClientConnectionError, ClientPayloadError, \
+    ClientResponse, MultipartWriter
+from .errors import RequestError
 from .types import _Http
 
 
-__all__ = ('File', 'Directory')
+__all__ = ('File', 'Directory', 'UploadResult', 'download_ranges')
+
+# signed upload URLs are valid for 15 minutes
+_UPLOAD_URL_TTL = 600.0
+
+# downloaded chunks are written to disk in batches of at least this size
+_WRITE_BATCH = 1 << 20
+
+UploadSource = str | os.PathLike | tuple[str, AsyncIterable[bytes]]
+
+
+@dataclass
+class UploadResult:
+    name: str
+    size: int
+    elapsed: float
+    error: Exception | None = None
+
+    def __repr__(self) -> str:
+        return f'<UploadResult name={self.name} ok={self.ok}>'
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def throughput(self) -> float:
+        """The average upload speed in bytes per second."""
+        return self.size / self.elapsed if self.elapsed else 0.0
+
+
+@contextmanager
+def _changes(
+    http: _Http,
+    identifier: str,
+    *paths: str,
+    subtrees: Iterable[str] = ()
+):
+    try:
+        yield
+    finally:
+        if (cache := http.listings) is not None:
+            for path in paths:
+                cache.invalidate(identifier, path)
+
+            for path in subtrees:
+                cache.invalidate(identifier, path, subtree=True)
+
+
+def _destination(root: str, to: str) -> str:
+    # a rename target is relative to the root and can move the entry into
+    # another directory, such as ``../other/name``
+    return posixpath.dirname(posixpath.normpath(
+        root.rstrip('/') + '/' + to)) or '/'
+
+
+async def _read_chunks(path: str, size: int) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    with open(path, 'rb') as file:
+        while chunk := await loop.run_in_executor(None, file.read, size):
+            yield chunk
+
+
+async def _unless_stalled(
+    coro: Awaitable[Any],
+    progress: Callable[[], int],
+    timeout: float
+) -> Any:
+    # the read timeout only starts once a request body is sent, so a peer that
+    # stops reading an upload would otherwise hold it open forever
+    task = asyncio.ensure_future(coro)
+    last = progress()
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+        if done:
+            return task.result()
+
+        if progress() == last:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise asyncio.TimeoutError(
+                f'no progress was made for {timeout} seconds')
+
+        last = progress()
+
+
+class _Writer:
+    """Writes chunks to a file in the default executor, in batches, so that
+    disk writes do not block the event loop. Each batch is written at
+    ``offset`` if given, otherwise at the current position of the file.
+    """
+
+    def __init__(self, file, offset: int = None) -> None:
+        self._file = file
+        self._buffer: list[bytes] = []
+        self._buffered = 0
+        self.offset = offset
+
+    def _write(self, data: list[bytes], offset: int | None) -> None:
+        if offset is not None:
+            self._file.seek(offset)
+
+        self._file.writelines(data)
+
+    async def write(self, chunk: bytes) -> None:
+        self._buffer.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered >= _WRITE_BATCH:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+
+        data, size = self._buffer, self._buffered
+        self._buffer, self._buffered = [], 0
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._write, data, self.offset)
+        if self.offset is not None:
+            self.offset += size
+
+
+def _content_total(response: ClientResponse, offset: int) -> int | None:
+    if (crange := response.headers.get('Content-Range')) is not None:
+        size = crange.rsplit('/', 1)[-1]
+        return int(size) if size.isdigit() else None
+
+    if response.content_length is not None:
+        return offset + response.content_length
+
+    return None
+
+
+async def download_ranges(
+    http: _Http,
+    url: str,
+    dest: str,
+    refresh: Callable[[], Awaitable[str]],
+    *,
+    parts: int = 4,
+    segment_size: int = 8 * 1024 * 1024,
+    chunk_size: int = 65536,
+    retries: int = 3,
+    checksum: str = None,
+    progress: Callable[[int, int | None], Any] = None
+) -> None:
+    """Downloads a signed URL to a local path, fetching byte ranges over
+    several connections at once into a preallocated ``<dest>.part`` file that
+    is moved to ``dest`` once complete. If the server does not support
+    ranges, the file is streamed in a single request instead, which is only
+    aborted if it goes the request manager's ``stream_timeout`` without
+    receiving data. This is used by :meth:`PteroClient.download_backup`.
+
+    http: :class:`RequestManager`
+        The request manager to download with.
+    url: :class:`str`
+        The signed URL to download.
+    dest: :class:`str`
+        The local path to save the file to. This must not exist.
+    refresh: Callable[[], Awaitable[:class:`str`]]
+        A function that fetches a new signed URL when the current one is
+        rejected.
+    parts: Optional[:class:`int`]
+        The number of ranges to download at once (default is ``4``).
+    segment_size: Optional[:class:`int`]
+        The number of bytes in each range (default is ``8 MiB``).
+    chunk_size: Optional[:class:`int`]
+        The number of bytes to read at a time (default is ``65536``).
+    retries: Optional[:class:`int`]
+        The number of times to retry or resume each range (default is
+        ``3``).
+    checksum: Optional[:class:`str`]
+        The expected checksum as ``<algorithm>:<hex digest>`` (default is
+        ``None``, not verified).
+    progress: Optional[Callable[[:class:`int`, :class:`int` | None], Any]]
+        A function called with the bytes downloaded so far and the total
+        size, if known (default is ``None``).
+    """
+    if os.path.exists(dest):
+        raise FileExistsError(f"file '{dest}' already exists")
+
+    if parts < 1:
+        raise ValueError('parts must be at least 1')
+
+    hasher = expected = None
+    if checksum:
+        # pterodactyl checksums are formatted as "<algorithm>:<hex digest>"
+        algorithm, _, expected = checksum.rpartition(':')
+        hasher = hashlib.new(algorithm or 'sha1')
+        expected = expected.lower()
+
+    part = dest + '.part'
+    lock = asyncio.Lock()
+    received = 0
+
+    def report(size: int, total: int | None) -> None:
+        nonlocal received
+        received += size
+        if progress is not None:
+            progress(received, total)
+
+    async def renew(stale: str) -> None:
+        nonlocal url
+        async with lock:
+            if url == stale:
+                url = await refresh()
+
+    def finish() -> None:
+        if hasher is not None and hasher.hexdigest() != expected:
+            os.remove(part)
+            raise RequestError(
+                f"checksum mismatch for '{dest}' (expected {expected}, got "
+                f'{hasher.hexdigest()})')
+
+        os.replace(part, dest)
+
+    # a one byte request reports the size and whether ranges are supported
+    for attempt in range(retries + 1):
+        stale = url
+        async with http._stream('GET', url,
+                                headers={'Range': 'bytes=0-0'}) as response:
+            if response.status in (401, 403) and attempt < retries:
+                await renew(stale)
+                continue
+
+            if response.status == 200:
+                # no range support, so the whole file is streamed at once;
+                # _stream sets no total timeout, only one between reads
+                total = response.content_length
+                try:
+                    with open(part, 'wb') as file:
+                        writer = _Writer(file)
+                        async for chunk in \
+                                response.content.iter_chunked(chunk_size):
+                            await writer.write(chunk)
+                            if hasher is not None:
+                                hasher.update(chunk)
+
+                            report(len(chunk), total)
+
+                        await writer.flush()
+
+                    if total is not None and received != total:
+                        raise RequestError('download ended before the file '
+                                           'was complete')
+                except BaseException:
+                    os.remove(part)
+                    raise
+
+                return finish()
+
+            if response.status != 206:
+                raise RequestError(
+                    f'failed to download file (status: {response.status})')
+
+            if (total := _content_total(response, 0)) is None:
+                raise RequestError('server did not report the file size')
+
+            break
+
+    def preallocate() -> None:
+        with open(part, 'wb') as file:
+            file.truncate(total)
+
+    await asyncio.get_running_loop().run_in_executor(None, preallocate)
+
+    count = max(-(-total // segment_size), 1)
+    following = 0
+    frontier = 0
+    completed: dict[int, list[bytes]] = {}
+    # bounds the segments held in memory while waiting to be hashed in order
+    window = asyncio.Semaphore(parts * 2)
+
+    async def fetch(file, start: int, end: int) -> list[bytes]:
+        chunks: list[bytes] = []
+        done = 0
+        for attempt in range(retries + 1):
+            stale = url
+            headers = {'Range': f'bytes={start + done}-{end}'}
+            try:
+                async with http._stream('GET', url,
+                                        headers=headers) as response:
+                    if response.status in (401, 403) and attempt < retries:
+                        await renew(stale)
+                        continue
+
+                    if response.status >= 500 and attempt < retries:
+                        continue
+
+                    if response.status != 206:
+                        raise RequestError(
+                            f'failed to download bytes {start}-{end} '
+                            f'(status: {response.status})')
+
+                    writer = _Writer(file, start + done)
+                    try:
+                        async for chunk in \
+                                response.content.iter_chunked(chunk_size):
+                            await writer.write(chunk)
+                            if hasher is not None:
+                                chunks.append(chunk)
+
+                            done += len(chunk)
+                            report(len(chunk), total)
+                    finally:
+                        # a retry resumes from ``done``, so it must be on disk
+                        await writer.flush()
+            except (ClientPayloadError, ClientConnectionError,
+                    asyncio.TimeoutError):
+                if attempt >= retries:
+                    raise
+
+            if start + done > end:
+                return chunks
+
+        raise RequestError(f'failed to download bytes {start}-{end}')
+
+    async def worker() -> None:
+        nonlocal following, frontier
+        with open(part, 'r+b') as file:
+            while True:
+                await window.acquire()
+                if following >= count:
+                    window.release()
+                    return
+
+                index = following
+                following += 1
+                start = index * segment_size
+                end = min(start + segment_size, total) - 1
+                completed[index] = await fetch(file, start, end)
+
+                while frontier in completed:
+                    if hasher is not None:
+                        for chunk in completed.pop(frontier):
+                            hasher.update(chunk)
+                    else:
+                        del completed[frontier]
+
+                    frontier += 1
+                    window.release()
+
+    tasks = [asyncio.ensure_future(worker())
+             for _ in range(min(parts, count))]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        os.remove(part)
+        raise
+
+    finish()
 
 
 class File:
@@ -62,53 +430,143 @@ class File:
 
         return data['attributes']['url']
 
-    async def download_to(self, dest: str, /) -> None:
-        file = open(dest, 'xb')
+    async def download_to(
+        self,
+        dest: str,
+        /,
+        *,
+        chunk_size: int = 65536,
+        retries: int = 3,
+        progress: Callable[[int, int | None], Any] = None
+    ) -> None:
+        """Streams the file to a local path in chunks. The data is written to
+        ``<dest>.part`` and moved to ``dest`` once complete, so memory use does
+        not depend on the file size. If the connection drops, the download
+        resumes from the partial file with an HTTP ``Range`` request, as does
+        calling this again after a failed download.
+
+        dest: :class:`str`
+            The local path to save the file to. This must not exist.
+        chunk_size: Optional[:class:`int`]
+            The number of bytes to read at a time (default is ``65536``).
+        retries: Optional[:class:`int`]
+            The number of times to resume after an interruption (default is
+            ``3``).
+        progress: Optional[Callable[[:class:`int`, :class:`int` | None], Any]]
+            A function called with the bytes downloaded so far and the total
+            size, if known (default is ``None``).
+        """
+        if os.path.exists(dest):
+            raise FileExistsError(f"file '{dest}' already exists")
+
+        part = dest + '.part'
         url = await self.get_download_url()
-
-        # TODO: resolve this
-        dl = await self._http._raw('GET', url, ctype='text/plain')
-        file.write(bytes(dl, 'utf-8'))
-        file.close()
+        attempt = 0
+
+        while True:
+            done = os.path.getsize(part) if os.path.exists(part) else 0
+            headers = {'Range': f'bytes={done}-'} if done else None
+            try:
+                async with self._http._stream('GET', url,
+                                              headers=headers) as response:
+                    if response.status in (401, 403) and attempt < retries:
+                        attempt += 1
+                        url = await self.get_download_url()
+                        continue
+
+                    if response.status == 416 and done:
+                        if _content_total(response, 0) in (None, done):
+                            break
+
+                        # the partial file does not match, start over
+                        os.remove(part)
+                        attempt += 1
+                        continue
+
+                    if response.status not in (200, 206):
+                        raise RequestError(
+                            'failed to download file (status: '
+                            f'{response.status})')
+
+                    if response.status == 200:
+                        done = 0
+
+                    total = _content_total(response, done)
+                    with open(part, 'ab' if done else 'wb') as file:
+                        writer = _Writer(file)
+                        try:
+                            async for chunk in \
+                                    response.content.iter_chunked(chunk_size):
+                                await writer.write(chunk)
+                                done += len(chunk)
+                                if progress is not None:
+                                    progress(done, total)
+                        finally:
+                            # keeps the partial file in line with ``done``
+                            await writer.flush()
+
+                    if total is None or done >= total:
+                        break
+            except (ClientPayloadError, ClientConnectionError,
+                    asyncio.TimeoutError):
+                if attempt >= retries:
+                    raise
+
+            attempt += 1
+            if attempt > retries:
+                raise RequestError('download ended before the file was '
+                                   'complete')
+
+        os.replace(part, dest)
 
     async def rename(self, name: str, /) -> None:
-        await self._http.put(
-            f'/servers/{self.identifier}/files/rename',
-            {
-                'root': self.root,
-                'files': [{
-                    'from': self.__name,
-                    'to': name
-                }]
-            })
+        with _changes(self._http, self.identifier, self.root,
+                      _destination(self.root, name)):
+            await self._http.put(
+                f'/servers/{self.identifier}/files/rename',
+                {
+                    'root': self.root,
+                    'files': [{
+                        'from': self.__name,
+                        'to': name
+                    }]
+                })
 
         self.__name = name
 
     async def copy_to(self, location: str, /) -> None:
-        await self._http.post(f'/servers/{self.identifier}/files/copy',
-                              {'location': location})
+        with _changes(self._http, self.identifier, self.root,
+                      posixpath.dirname(location) or '/'):
+            await self._http.post(f'/servers/{self.identifier}/files/copy',
+                                  {'location': location})
 
     async def write(self, data: str, /) -> None:
-        await self._http.post(
-            f'/servers/{self.identifier}/files/write?file={self.__path}',
-            ctype='text/plain',
-            body=bytes(data, 'utf-8'))
+        with _changes(self._http, self.identifier, self.root):
+            await self._http.post(
+                f'/servers/{self.identifier}/files/write?file={self.__path}',
+                ctype='text/plain',
+                body=bytes(data, 'utf-8'))
 
     async def compress(self):
-        data = await self._http.post(
-            f'/servers/{self.identifier}/files/compress',
-            {'root': self.root, 'files': [self.__name]})
+        with _changes(self._http, self.identifier, self.root):
+            data = await self._http.post(
+                f'/servers/{self.identifier}/files/compress',
+                {'root': self.root, 'files': [self.__name]})
 
         return File(self._http, self.identifier, self.__path,
                     data['attributes'])
 
     async def decompress(self) -> None:
-        await self._http.post(f'/servers/{self.identifier}/files/decompress',
-                              {'root': self.root, 'file': self.__name})
+        # extracted archives can add to or replace existing subdirectories
+        with _changes(self._http, self.identifier, subtrees=[self.root]):
+            await self._http.post(
+                f'/servers/{self.identifier}/files/decompress',
+                {'root': self.root, 'file': self.__name})
 
     async def delete(self) -> None:
-        await self._http.post(f'/servers/{self.identifier}/files/delete',
-                              {'root': self.root, 'files': [self.__name]})
+        with _changes(self._http, self.identifier, self.root):
+            await self._http.post(f'/servers/{self.identifier}/files/delete',
+                                  {'root': self.root, 'files': [self.__name]})
 
 
 class Directory:
@@ -127,36 +585,118 @@ class Directory:
     def path(self) -> str:
         return self.__path
 
-    async def get_files(self) -> list[File]:
-        data = await self._http.get(
-            f'/servers/{self.identifier}/files/list?directory={self.__path}')
-
-        res: list[File] = []
-
-        for datum in data['data']:
+    @property
+    def name(self) -> str:
+        return self.__path.rstrip('/').rsplit('/', 1)[-1]
+
+    async def _list(self) -> tuple[list[File], list['Directory']]:
+        cache = self._http.listings
+        entries = None
+        if cache is not None:
+            entries = cache.get(self.identifier, self.__path)
+
+        if entries is None:
+            generation = None
+            if cache is not None:
+                generation = cache.generation(self.identifier)
+
+            data = await self._http.get(
+                f'/servers/{self.identifier}/files/list'
+                f'?directory={self.__path}')
+            entries = data['data']
+            if cache is not None:
+                cache.set(self.identifier, self.__path, entries, generation)
+
+        files: list[File] = []
+        dirs: list[Directory] = []
+
+        for datum in entries:
             if datum['attributes']['mimetype'] == 'inode/directory':
-                continue
+                path = self._join(datum['attributes']['name'])
+                dirs.append(Directory(self._http, self.identifier, path))
+            else:
+                files.append(File(
+                    self._http,
+                    self.identifier,
+                    self.__path,
+                    datum['attributes']))
 
-            res.append(File(
-                self._http,
-                self.identifier,
-                self.__path,
-                datum['attributes']))
+        return files, dirs
 
-        return res
+    async def get_files(self) -> list[File]:
+        files, _ = await self._list()
+        return files
 
     async def get_directories(self):
-        data = await self._http.get(
-            f'/servers/{self.identifier}/files/list?directory={self.__path}')
-
-        res: list[Directory] = []
+        _, dirs = await self._list()
+        return dirs
 
-        for datum in data['data']:
-            if datum['attributes']['mimetype'] == 'inode/directory':
-                path = self._clean(self.__path + datum['attributes']['name'])
-                res.append(Directory(self._http, self.identifier, path))
-
-        return res
+    async def walk(
+        self,
+        *,
+        concurrency: int = 4,
+        max_depth: int = None,
+        include: list[str] = None,
+        exclude: list[str] = None
+    ) -> AsyncIterator[tuple['Directory', list[File], list['Directory']]]:
+        """Walks the directory tree breadth-first, listing each directory
+        once. For every directory this yields a tuple of the directory, its
+        files and its subdirectories, in the order the listings arrive.
+
+        concurrency: Optional[:class:`int`]
+            The maximum number of directories to list at once (default is
+            ``4``).
+        max_depth: Optional[:class:`int`]
+            The maximum depth to descend to, where ``0`` only lists this
+            directory (default is ``None``, no limit).
+        include: Optional[list[:class:`str`]]
+            Glob patterns that file names or paths must match to be yielded
+            (default is ``None``, all files).
+        exclude: Optional[list[:class:`str`]]
+            Glob patterns for file and directory names or paths to skip.
+            Excluded directories are not descended into (default is
+            ``None``).
+        """
+        def matches(name: str, path: str, patterns: list[str]) -> bool:
+            return any(fnmatchcase(name, p) or fnmatchcase(path, p)
+                       for p in patterns)
+
+        async def listing(node: Directory, depth: int):
+            files, dirs = await node._list()
+            return node, depth, files, dirs
+
+        pending: deque[tuple[Directory, int]] = deque([(self, 0)])
+        running: set[asyncio.Future] = set()
+        try:
+            while pending or running:
+                while pending and len(running) < concurrency:
+                    running.add(asyncio.ensure_future(
+                        listing(*pending.popleft())))
+
+                done, running = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node, depth, files, dirs = task.result()
+                    if exclude:
+                        files = [f for f in files
+                                 if not matches(f.name, f.path, exclude)]
+                        dirs = [d for d in dirs
+                                if not matches(d.name, d.path, exclude)]
+
+                    if include:
+                        files = [f for f in files
+                                 if matches(f.name, f.path, include)]
+
+                    if max_depth is None or depth < max_depth:
+                        pending.extend((d, depth + 1) for d in dirs)
+
+                    yield node, files, dirs
+        finally:
+            for task in running:
+                task.cancel()
+
+    def _join(self, name: str, /) -> str:
+        return self._clean(self.__path.rstrip('/') + '/' + name)
 
     def _clean(self, path: str, /) -> str:
         if 'home/directory' in path:
@@ -175,36 +715,49 @@ class Directory:
 
         return Directory(self._http, self.identifier, path)
 
+    @property
+    def parent(self) -> str:
+        return posixpath.dirname(self.__path.rstrip('/')) or '/'
+
     async def rename_all(self, files: list[dict[str, str]]) -> None:
         parsed = list(filter(lambda d: 'from' in d and 'to' in d, files))
         if len(parsed) == 0:
             raise SyntaxError('no files with from and to keys found')
 
-        await self._http.post(f'/servers/{self.identifier}/files/rename',
-                              {'root': self.__path, 'files': files})
+        with _changes(self._http, self.identifier, self.__path,
+                      *(_destination(self.__path, d['to']) for d in parsed),
+                      subtrees=[self._join(d['from']) for d in parsed]):
+            await self._http.post(f'/servers/{self.identifier}/files/rename',
+                                  {'root': self.__path, 'files': files})
 
     async def create_dir(self, name: str, /):
-        await self._http.post(
-            f'/servers/{self.identifier}/files/create-folder',
-            {'root': self.__path, 'name': name})
+        with _changes(self._http, self.identifier, self.__path):
+            await self._http.post(
+                f'/servers/{self.identifier}/files/create-folder',
+                {'root': self.__path, 'name': name})
 
-        return Directory(self._http, self.identifier,
-                         self._clean(self.__path + name))
+        return Directory(self._http, self.identifier, self._join(name))
 
     async def delete_dir(self, name: str, /) -> None:
-        await self._http.post(f'/servers/{self.identifier}/files/delete',
-                              {'root': self.__path, 'files': [name]})
+        with _changes(self._http, self.identifier, self.__path,
+                      subtrees=[self._join(name)]):
+            await self._http.post(f'/servers/{self.identifier}/files/delete',
+                                  {'root': self.__path, 'files': [name]})
 
     async def delete_all(self, files: list[dict[str, str]], /) -> None:
         parsed = list(filter(lambda d: 'from' in d and 'to' in d, files))
         if len(parsed) == 0:
             raise SyntaxError('no files with from and to keys found')
 
-        await self._http.post(f'/servers/{self.identifier}/files/delete',
-                              {'root': self.__path, 'files': files})
+        with _changes(self._http, self.identifier, self.__path,
+                      subtrees=[self._join(d['from']) for d in parsed]):
+            await self._http.post(f'/servers/{self.identifier}/files/delete',
+                                  {'root': self.__path, 'files': files})
 
     async def delete(self) -> None:
-        await self.delete_dir(self.__path)
+        with _changes(self._http, self.identifier, self.parent,
+                      subtrees=[self.__path]):
+            await self.delete_dir(self.__path)
 
     async def pull_file(
         self,
@@ -218,16 +771,124 @@ class Directory:
         if directory is None:
             directory = self.__path
 
-        await self._http.post(
-            f'/servers/{self.identifier}/files/pull',
-            {
-                'url': url,
-                'directory': directory,
-                'filename': filename,
-                'use_header': use_header,
-                'foreground': foreground
-            })
+        with _changes(self._http, self.identifier, directory):
+            await self._http.post(
+                f'/servers/{self.identifier}/files/pull',
+                {
+                    'url': url,
+                    'directory': directory,
+                    'filename': filename,
+                    'use_header': use_header,
+                    'foreground': foreground
+                })
 
     async def get_upload_url(self) -> str:
         data = await self._http.get(f'/servers/{self.identifier}/files/upload')
         return data['attributes']['url']
+
+    async def upload(
+        self,
+        files: Iterable[UploadSource],
+        /,
+        *,
+        concurrency: int = 4,
+        chunk_size: int = 65536,
+        progress: Callable[[str, int, int | None], Any] = None
+    ) -> list[UploadResult]:
+        """Uploads files into this directory through a signed upload URL,
+        streaming each one as multipart form data without reading it into
+        memory. The signed URL is fetched once and refreshed when it is close
+        to expiring or is rejected. Uploads have no limit on their total
+        duration, but one is aborted if no bytes are sent for the request
+        manager's ``stream_timeout``.
+
+        files: Iterable[:class:`str` | tuple[:class:`str`, AsyncIterable]]
+            The local file paths to upload, or tuples of a file name and an
+            async iterable of the file's bytes.
+        concurrency: Optional[:class:`int`]
+            The maximum number of files to upload at once (default is ``4``).
+        chunk_size: Optional[:class:`int`]
+            The number of bytes to read from local files at a time (default
+            is ``65536``).
+        progress: Optional[Callable[..., Any]]
+            A function called with the file name, the bytes sent so far and
+            the file size if known, or ``None`` (default is ``None``).
+
+        Returns a list of :class:`UploadResult` in the order of ``files``.
+        Failed uploads have their error set instead of raising it.
+        """
+        url: str | None = None
+        fetched = 0.0
+        lock = asyncio.Lock()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def signed(refresh: bool) -> str:
+            nonlocal url, fetched
+            async with lock:
+                if refresh or url is None or \
+                        monotonic() - fetched > _UPLOAD_URL_TTL:
+                    url = await self.get_upload_url()
+                    fetched = monotonic()
+
+                return url + '&directory=' + quote(self.__path)
+
+        async def send(item: UploadSource) -> UploadResult:
+            if isinstance(item, tuple):
+                name, source = item
+                total = None
+                reusable = False
+            else:
+                path = os.fspath(item)
+                name = os.path.basename(path)
+                source = None
+                total = os.path.getsize(path)
+                reusable = True
+
+            sent = 0
+
+            async def counted() -> AsyncIterator[bytes]:
+                nonlocal sent
+                chunks = source if source is not None \
+                    else _read_chunks(path, chunk_size)
+                async for chunk in chunks:
+                    sent += len(chunk)
+                    if progress is not None:
+                        progress(name, sent, total)
+
+                    yield chunk
+
+            async def post(target: str, body: MultipartWriter) -> int:
+                async with self._http._stream('POST', target,
+                                              body=body) as response:
+                    return response.status
+
+            async with limit:
+                start = monotonic()
+                try:
+                    for attempt in range(2):
+                        sent = 0
+                        with MultipartWriter('form-data') as writer:
+                            part = writer.append(counted())
+                            part.set_content_disposition(
+                                'form-data', name='files', filename=name)
+
+                        status = await _unless_stalled(
+                            post(await signed(attempt > 0), writer),
+                            lambda: sent, self._http.stream_timeout)
+                        if status in (200, 201, 204):
+                            break
+
+                        if status in (401, 403) and reusable and \
+                                attempt == 0:
+                            continue
+
+                        raise RequestError(
+                            f"failed to upload file '{name}' (status: "
+                            f'{status})')
+                except Exception as ex:  # pylint: disable=W0703
+                    return UploadResult(name, sent, monotonic() - start, ex)
+
+                return UploadResult(name, sent, monotonic() - start)
+
+        with _changes(self._http, self.identifier, self.__path):
+            return list(await asyncio.gather(*(send(item) for item in files)))
@@ -1,26 +1,169 @@
-from json import dumps
+import asyncio
 from sys import getsizeof
 from time import time
-from typing import Any, Callable
-from aiohttp import ClientSession, ClientResponse
+from typing import Any, Callable, Mapping, NamedTuple
+from aiohttp import ClientConnectionError, ClientSession, ClientResponse, \
+    ClientTimeout, TCPConnector
+from .cache import ListingCache, ResponseCache
+from .codec import Codec, get_codec
 from .errors import PteroAPIError, RequestError
 from .events import Emitter
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
 
 
 __all__ = ('RequestManager',)
 
 
+class _Response(NamedTuple):
+    status: int
+    headers: Mapping[str, str]
+    data: Any
+    size: int
+
+
+class _Transient(Exception):
+    def __init__(self, error: Exception, retry_after: str | None) -> None:
+        super().__init__(str(error))
+        self.error = error
+        self.retry_after = retry_after
+
+
 class RequestManager(Emitter):
-    def __init__(self, api: str, url: str, key: str) -> None:
+    """The HTTP manager used by the API interfaces. A single client session
+    (and its connection pool) is kept for the lifetime of the manager so that
+    connections to the panel are reused between requests.
+
+    api: :class:`str`
+        The API type, either ``application`` or ``client``.
+    url: :class:`str`
+        The URL of the Pterodactyl domain.
+    key: :class:`str`
+        The API key to use for HTTP requests.
+    limit_per_host: Optional[:class:`int`]
+        The maximum number of simultaneous connections to a single host
+        (default is ``10``).
+    dns_ttl: Optional[:class:`int`]
+        The number of seconds to cache DNS lookups for (default is ``300``).
+    keepalive_timeout: Optional[:class:`float`]
+        The number of seconds an idle connection is kept open for (default is
+        ``30``).
+    stream_timeout: Optional[:class:`float`]
+        The number of seconds a streamed download or upload may take to
+        connect, or go without receiving data, before it is aborted. Streamed
+        transfers have no limit on their total duration (default is ``60``).
+    rate_limit: Optional[:class:`bool`]
+        Whether requests should be queued to stay within the panel's rate
+        limit (default is ``True``). The limiter is available at
+        :attr:`ratelimiter`.
+    retry: Optional[:class:`RetryPolicy`]
+        The policy for retrying transient failures (default is a
+        :class:`RetryPolicy` with its default values). Set to ``None`` to
+        disable retries. Each retry emits the ``on_retry`` event with the
+        method, path, attempt number and delay.
+    coalesce: Optional[:class:`bool`]
+        Whether concurrent ``GET`` requests for the same path and query
+        should share a single network request (default is ``True``). Callers
+        then receive the same response object, so it should not be mutated.
+        The number of shared and sent requests are counted in
+        :attr:`coalesce_hits` and :attr:`coalesce_misses`.
+    cache: Optional[:class:`ResponseCache`]
+        The cache to store ``GET`` responses in (default is ``None``, no
+        caching). Cached responses are shared between callers, so they should
+        not be mutated.
+    codec: Optional[:class:`str` | :class:`Codec`]
+        The JSON codec, or the name of the JSON library, to encode request
+        bodies and decode responses with (default is ``auto``, the fastest
+        installed library). See :func:`get_codec`.
+    listings: Optional[:class:`ListingCache`]
+        The cache to store server directory listings in (default is ``None``,
+        no caching).
+    """
+
+    def __init__(
+        self,
+        api: str,
+        url: str,
+        key: str,
+        *,
+        limit_per_host: int = 10,
+        dns_ttl: int = 300,
+        keepalive_timeout: float = 30.0,
+        stream_timeout: float = 60.0,
+        rate_limit: bool = True,
+        retry: RetryPolicy | None = RetryPolicy(),
+        coalesce: bool = True,
+        cache: ResponseCache | None = None,
+        codec: str | Codec = 'auto',
+        listings: ListingCache | None = None
+    ) -> None:
         super().__init__()
         self._api = api
         self.url = url
         self.key = key
         self.ping: float = float('nan')
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.stream_timeout = stream_timeout
+        self._session: ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.ratelimiter: RateLimiter | None = \
+            RateLimiter() if rate_limit else None
+        self.retry = retry
+        self.retries = 0
+        self.coalesce = coalesce
+        self.coalesce_hits = 0
+        self.coalesce_misses = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.cache = cache
+        self.codec = codec if isinstance(codec, Codec) else get_codec(codec)
+        self.listings = listings
 
     def __repr__(self) -> str:
         return '<RequestManager (Emitter)>'
 
+    @property
+    def closed(self) -> bool:
+        """Returns ``True`` if there is no open client session."""
+        return self._session is None or self._session.closed
+
+    @property
+    def session(self) -> ClientSession:
+        """Returns the client session for the manager, creating it if it is
+        not open or was opened in another event loop. This must be accessed
+        from within a running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # the session, pending requests and limiter lock are bound to the
+            # loop they were created in, which may have been closed
+            self._session = None
+            self._inflight.clear()
+            if self.ratelimiter is not None:
+                self.ratelimiter._lock = asyncio.Lock()
+
+        if self.closed:
+            connector = TCPConnector(
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout)
+            self._session = ClientSession(connector=connector)
+            self._loop = loop
+
+        return self._session
+
+    async def close(self) -> None:
+        """Closes the client session and all pooled connections. A new
+        session is opened automatically if another request is made.
+        """
+        if self._session is not None:
+            # a session from a closed loop can no longer be closed cleanly
+            if self._loop is asyncio.get_running_loop():
+                await self._session.close()
+
+            self._session = None
+
     def event(self, func: Callable[[str], None]) -> Callable[[str], None]:
         super().add_event(func.__name__, func)
         return func
@@ -60,7 +203,7 @@ class RequestManager(Emitter):
         if len(query) == 0:
             return ''
 
-        return '?' + query[0] + '&'.join(query[1:])
+        return '?' + '&'.join(query)
 
     async def _make(self, method: str, path: str, **kwargs):
         if method not in ('GET', 'POST', 'PATCH', 'PUT', 'DELETE'):
@@ -72,8 +215,9 @@ class RequestManager(Emitter):
 
         if body is not None:
             if ctype == 'application/json':
-                payload = dumps(body)
-                await super().emit_event('on_send', payload)
+                payload = self.codec.dumps(body)
+                if super().has_event('on_send'):
+                    await super().emit_event('on_send', payload.decode())
             else:
                 payload = body
 
@@ -84,43 +228,161 @@ class RequestManager(Emitter):
             f'request: {method} /api/{self._api}{path}',
             f'payload: {getsizeof(payload)} bytes')
 
-        async with ClientSession() as session:
-            start = time()
-            async with getattr(session, method.lower())(
-                    url,
-                    data=payload,
-                    headers=self.headers(ctype)) as response:
-                self.ping = time() - start
-                response: ClientResponse
-
-                await self._emit(
-                    'on_debug',
-                    f'response: {response.status}',
-                    f'content-type: {response.content_type}',
-                    f'content-length: {response.content_length or 0}')
-
-                if response.status == 204:
-                    return None
-
-                if response.status in (200, 201, 202):
-                    if response.headers.get('content-type') == \
-                            'application/json':
-                        data = await response.json()
-                        await super().emit_event('on_receive', data)
-                        return data
-
-                    data = await response.text()
-                    return data
-
-                if 400 <= response.status < 500:
-                    data: dict[str, Any] = await response.json()
-                    await super().emit_event('on_error', data)
-                    raise PteroAPIError(data['errors'][0]['code'], data)
-
-                raise RequestError(
+        force = kwargs.get('retry') or False
+        if method != 'GET' or payload is not None:
+            try:
+                res = await self._send(method, path, url, payload, ctype,
+                                       force)
+            finally:
+                if method != 'GET':
+                    # reads after a write must not join an earlier request
+                    self._inflight.clear()
+                    if self.cache is not None:
+                        self.cache.invalidate(path)
+
+            return res.data
+
+        if self.cache is not None and self.cache.ttl_for(path) is not None \
+                and (data := self.cache.get(url)) is not None:
+            await super().emit_event('on_debug', f'cached: GET {url}')
+            return data
+
+        if not self.coalesce:
+            return await self._fetch(path, url, ctype, force)
+
+        if (task := self._inflight.get(url)) is not None:
+            self.coalesce_hits += 1
+            await super().emit_event('on_debug', f'coalesced: GET {url}')
+            return await asyncio.shield(task)
+
+        self.coalesce_misses += 1
+        task = asyncio.ensure_future(self._fetch(path, url, ctype, force))
+        self._inflight[url] = task
+        task.add_done_callback(lambda t: self._settle(url, t))
+        return await asyncio.shield(task)
+
+    def _settle(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        # marks the exception as retrieved if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, path: str, url: str, ctype: str, force: bool):
+        ttl = self.cache.ttl_for(path) if self.cache is not None else None
+        if ttl is None:
+            res = await self._send('GET', path, url, None, ctype, force)
+            return res.data
+
+        headers = None
+        entry = self.cache.peek(url)
+        if entry is not None and entry.etag is not None:
+            headers = {'If-None-Match': entry.etag}
+
+        res = await self._send('GET', path, url, None, ctype, force, headers)
+        if res.status == 304 and entry is not None:
+            self.cache.revalidated(url, ttl)
+            return entry.value
+
+        self.cache.set(url, res.data, ttl, size=res.size,
+                       etag=res.headers.get('ETag'), path=path)
+        return res.data
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        url: str,
+        payload,
+        ctype: str,
+        force: bool,
+        headers: dict[str, str] = None
+    ) -> _Response:
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await self._request(method, url, payload, ctype,
+                                           headers)
+            except _Transient as ex:
+                error, retry_after = ex.error, ex.retry_after
+            except (ClientConnectionError, asyncio.TimeoutError) as ex:
+                error, retry_after = ex, None
+
+            if self.retry is None or \
+                    not self.retry.allows(method, attempt, force=force):
+                raise error
+
+            delay = self.retry.delay(attempt, retry_after)
+            self.retries += 1
+            await super().emit_event(
+                'on_debug',
+                f'retry: {method} /api/{self._api}{path} failed ({error!r}),'
+                f' attempt {attempt + 1} in {delay:.2f}s')
+            await super().emit_event('on_retry', method, path, attempt, delay)
+            await asyncio.sleep(delay)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        payload,
+        ctype: str,
+        headers: dict[str, str] = None
+    ) -> _Response:
+        if self.ratelimiter is not None:
+            if (wait := self.ratelimiter.wait_time) > 0:
+                await super().emit_event(
+                    'on_debug', f'ratelimit: queued for {wait:.2f}s')
+
+            await self.ratelimiter.acquire()
+
+        start = time()
+        async with getattr(self.session, method.lower())(
+                url,
+                data=payload,
+                headers=self.headers(ctype) | (headers or {})) as response:
+            self.ping = time() - start
+            response: ClientResponse
+            if self.ratelimiter is not None:
+                self.ratelimiter.update(response.status, response.headers)
+
+            await self._emit(
+                'on_debug',
+                f'response: {response.status}',
+                f'content-type: {response.content_type}',
+                f'content-length: {response.content_length or 0}')
+
+            if response.status in (204, 304):
+                return _Response(response.status, response.headers, None, 0)
+
+            if response.status in (200, 201, 202):
+                raw = await response.read()
+                if response.content_type == 'application/json':
+                    data = self.codec.loads(raw)
+                    await super().emit_event('on_receive', data)
+                else:
+                    data = raw.decode(response.get_encoding())
+
+                return _Response(response.status, response.headers, data,
+                                 len(raw))
+
+            if 400 <= response.status < 500:
+                data: dict[str, Any] = self.codec.loads(await response.read())
+                await super().emit_event('on_error', data)
+                error = PteroAPIError(data['errors'][0]['code'], data)
+            else:
+                error = RequestError(
                     'pterodactyl api returned an invalid or unacceptable'
                     f' response (status: {response.status})')
 
+            if self.retry is not None and \
+                    response.status in self.retry.statuses:
+                raise _Transient(error, response.headers.get('Retry-After'))
+
+            raise error
+
     async def _raw(self, method: str, url: str, *, ctype: str, body=None):
         if method not in ('GET', 'POST', 'PATCH', 'PUT', 'DELETE'):
             raise KeyError(f"invalid http method '{method}'")
@@ -128,34 +390,111 @@ class RequestManager(Emitter):
         headers = self.headers(ctype)
         del headers['Authorization']
 
-        async with ClientSession() as session:
-            async with getattr(session, method.lower())(
-                    url,
-                    data=body,
-                    headers=headers) as response:
-                response: ClientResponse
+        async with getattr(self.session, method.lower())(
+                url,
+                data=body,
+                headers=headers) as response:
+            response: ClientResponse
 
-                if response.status == 204:
-                    return None
+            if response.status == 204:
+                return None
 
-                if response.status in (200, 201, 202):
-                    if response.headers.get('content-type') == \
-                            'application/json':
-                        data = await response.json()
-                        await super().emit_event('on_receive', data)
-                        return data
-
-                    data = await response.text()
+            if response.status in (200, 201, 202):
+                if response.content_type == 'application/json':
+                    data = self.codec.loads(await response.read())
+                    await super().emit_event('on_receive', data)
                     return data
 
-                if 400 <= response.status < 500:
-                    data: dict[str, Any] = await response.json()
-                    await super().emit_event('on_error', data)
-                    raise RequestError(data.get('error', 'unknown api error'))
+                data = await response.text()
+                return data
 
-                raise RequestError(
-                    'pterodactyl api returned an invalid or unacceptable'
-                    f' response (status: {response.status})')
+            if 400 <= response.status < 500:
+                data: dict[str, Any] = self.codec.loads(await response.read())
+                await super().emit_event('on_error', data)
+                raise RequestError(data.get('error', 'unknown api error'))
+
+            raise RequestError(
+                'pterodactyl api returned an invalid or unacceptable'
+                f' response (status: {response.status})')
+
+    def _stream(self, method: str, url: str, *, headers=None, body=None):
+        """Returns a request context manager for a signed (unauthenticated)
+        URL without reading the response body, so that it can be streamed.
+        """
+        if method not in ('GET', 'POST', 'PATCH', 'PUT', 'DELETE'):
+            raise KeyError(f"invalid http method '{method}'")
+
+        # the session's total timeout would cut off long transfers
+        timeout = ClientTimeout(total=None, sock_connect=self.stream_timeout,
+                                sock_read=self.stream_timeout)
+        return getattr(self.session, method.lower())(
+            url,
+            data=body,
+            headers={'User-Agent': self.headers('')['User-Agent']} |
+            (headers or {}),
+            timeout=timeout)
+
+    async def fetch_all(
+        self,
+        path: str,
+        *,
+        concurrency: int = 4,
+        per_page: int = None,
+        **query
+    ) -> list[dict[str, Any]]:
+        """Fetches every page of a list endpoint and returns all the items in
+        their original order. The first page is fetched to get the total
+        number of pages, then the remaining pages are fetched concurrently.
+        If any page fails, the remaining requests are cancelled and the error
+        is raised.
+
+        path: :class:`str`
+            The path of the list endpoint.
+        concurrency: Optional[:class:`int`]
+            The maximum number of pages to fetch at once (default is ``4``).
+        per_page: Optional[:class:`int`]
+            The number of items to request per page (default is ``None``).
+        query: Any
+            Additional query options (``_filter``, ``include`` and ``sort``).
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+
+        first = await self.get(path, page=1, per_page=per_page, **query)
+        items: list[dict[str, Any]] = list(first['data'])
+        pagination = first.get('meta', {}).get('pagination')
+        if pagination is None or pagination['total_pages'] <= 1:
+            return items
+
+        limit = asyncio.Semaphore(concurrency)
+
+        async def fetch(page: int) -> list[dict[str, Any]]:
+            async with limit:
+                data = await self.get(path, page=page, per_page=per_page,
+                                      **query)
+                return data['data']
+
+        tasks = [asyncio.ensure_future(fetch(page))
+                 for page in range(2, pagination['total_pages'] + 1)]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        for task in tasks:
+            if task.cancelled():
+                continue
+
+            if (ex := task.exception()) is not None:
+                raise ex
+
+        for task in tasks:
+            items.extend(task.result())
+
+        return items
 
     def get(
         self,
@@ -167,7 +506,8 @@ class RequestManager(Emitter):
         include: list[str] = None,
         sort: str = None,
         page: int = None,
-        per_page: int = None
+        per_page: int = None,
+        retry: bool = False
     ):
         return self._make(
             'GET',
@@ -178,7 +518,8 @@ class RequestManager(Emitter):
             include=include,
             sort=sort,
             page=page,
-            per_page=per_page)
+            per_page=per_page,
+            retry=retry)
 
     def post(
         self,
@@ -190,7 +531,8 @@ class RequestManager(Emitter):
         include: list[str] = None,
         sort: str = None,
         page: int = None,
-        per_page: int = None
+        per_page: int = None,
+        retry: bool = False
     ):
         return self._make(
             'POST',
@@ -201,7 +543,8 @@ class RequestManager(Emitter):
             include=include,
             sort=sort,
             page=page,
-            per_page=per_page)
+            per_page=per_page,
+            retry=retry)
 
     def patch(
         self,
@@ -213,7 +556,8 @@ class RequestManager(Emitter):
         include: list[str] = None,
         sort: str = None,
         page: int = None,
-        per_page: int = None
+        per_page: int = None,
+        retry: bool = False
     ):
         return self._make(
             'PATCH',
@@ -224,7 +568,8 @@ class RequestManager(Emitter):
             include=include,
             sort=sort,
             page=page,
-            per_page=per_page)
+            per_page=per_page,
+            retry=retry)
 
     def put(
         self,
@@ -236,7 +581,8 @@ class RequestManager(Emitter):
         include: list[str] = None,
         sort: str = None,
         page: int = None,
-        per_page: int = None
+        per_page: int = None,
+        retry: bool = False
     ):
         return self._make(
             'PUT',
@@ -247,7 +593,8 @@ class RequestManager(Emitter):
             include=include,
             sort=sort,
             page=page,
-            per_page=per_page)
+            per_page=per_page,
+            retry=retry)
 
     def delete(
         self,
@@ -259,7 +606,8 @@ class RequestManager(Emitter):
         include: list[str] = None,
         sort: str = None,
         page: int = None,
-        per_page: int = None
+        per_page: int = None,
+        retry: bool = False
     ):
         return self._make(
             'DELETE',
@@ -270,4 +618,5 @@ class RequestManager(Emitter):
             include=include,
             sort=sort,
             page=page,
-            per_page=per_page)
+            per_page=per_page,
+            retry=retry)
@@ -0,0 +1,95 @@
+"""Pagination helpers for list endpoints in Pytero."""
+
+from typing import Any, AsyncIterator, Callable, Generic, TypeVar
+from .types import _Http
+
+
+__all__ = ('Paginator',)
+
+T = TypeVar('T')
+
+
+class Paginator(Generic[T]):
+    """An async iterator that streams every model from a paginated list
+    endpoint, requesting the next page only once the current one has been
+    consumed.
+
+    http: :class:`RequestManager`
+        The HTTP manager to make requests with.
+    path: :class:`str`
+        The path of the list endpoint.
+    model: Callable[[dict[:class:`str`, Any]], T]
+        A function that creates a model from the attributes of an item.
+    per_page: Optional[:class:`int`]
+        The number of items to request per page (default is the panel
+        default).
+    query: Any
+        Additional query options (``_filter``, ``include`` and ``sort``).
+    """
+
+    def __init__(
+        self,
+        http: _Http,
+        path: str,
+        model: Callable[[dict[str, Any]], T],
+        *,
+        per_page: int = None,
+        **query
+    ) -> None:
+        self._http = http
+        self.path = path
+        self.model = model
+        self.per_page = per_page
+        self.query = query
+        self.total: int | None = None
+        self.total_pages: int | None = None
+
+    def __repr__(self) -> str:
+        return f'<Paginator path={self.path}>'
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[T]:
+        async for page in self.pages():
+            for item in page:
+                yield item
+
+    async def pages(self) -> AsyncIterator[list[T]]:
+        """Yields each page of models in order."""
+        current = 1
+        while True:
+            data = await self._http.get(self.path, page=current,
+                                        per_page=self.per_page, **self.query)
+            yield [self.model(datum['attributes']) for datum in data['data']]
+
+            pagination = data.get('meta', {}).get('pagination')
+            if pagination is None:
+                return
+
+            self.total = pagination['total']
+            self.total_pages = pagination['total_pages']
+            if pagination['current_page'] >= pagination['total_pages']:
+                return
+
+            current = pagination['current_page'] + 1
+
+    async def all(self, *, concurrency: int = 1) -> list[T]:
+        """Fetches every page and returns a list of all the models.
+
+        concurrency: Optional[:class:`int`]
+            The maximum number of pages to fetch at once (default is ``1``).
+            Values greater than ``1`` fetch the remaining pages concurrently
+            after the first, keeping the original order.
+        """
+        if concurrency > 1:
+            data = await self._http.fetch_all(
+                self.path, concurrency=concurrency, per_page=self.per_page,
+                **self.query)
+            return [self.model(datum['attributes']) for datum in data]
+
+        res: list[T] = []
+        async for page in self.pages():
+            res.extend(page)
+
+        return res
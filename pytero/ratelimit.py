@@ -0,0 +1,136 @@
+"""A token bucket rate limiter for Pytero that learns the request budget from
+the Pterodactyl rate limit headers.
+"""
+
+import asyncio
+from time import monotonic
+from typing import Mapping
+
+
+__all__ = ('RateLimiter',)
+
+
+class RateLimiter:
+    """A token bucket that queues outgoing requests so that they stay within
+    the panel's rate limit. The bucket starts with the given limit and is
+    updated from the ``X-RateLimit-Limit`` and ``X-RateLimit-Remaining``
+    headers of every response. The panel counts requests in fixed windows, so
+    once the remaining count reaches zero the bucket is held until the
+    current window has passed. A 429 response empties the bucket until the
+    ``Retry-After`` period has passed.
+
+    limit: Optional[:class:`int`]
+        The initial number of requests allowed per period (default is
+        ``240``).
+    period: Optional[:class:`float`]
+        The number of seconds the limit applies to (default is ``60``).
+    """
+
+    def __init__(self, limit: int = 240, period: float = 60.0) -> None:
+        self.limit = limit
+        self.period = period
+        self.tokens = float(limit)
+        self.total_wait: float = 0.0
+        self._updated = monotonic()
+        self._blocked_until: float = 0.0
+        self._window_start: float | None = None
+        self._lock = asyncio.Lock()
+        self._waiting = 0
+
+    def __repr__(self) -> str:
+        return f'<RateLimiter limit={self.limit} tokens={int(self.tokens)} ' \
+            f'queued={self._waiting}>'
+
+    @property
+    def rate(self) -> float:
+        """The number of tokens restored per second."""
+        return self.limit / self.period
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of requests currently waiting for a token."""
+        return self._waiting
+
+    @property
+    def wait_time(self) -> float:
+        """The estimated number of seconds a new request would wait before
+        being sent, including the requests already queued.
+        """
+        now = monotonic()
+        self._refill(now)
+        blocked = max(self._blocked_until - now, 0.0)
+        needed = self._waiting + 1 - self.tokens
+        if needed <= 0:
+            return blocked
+
+        return blocked + needed / self.rate
+
+    def _refill(self, now: float, /) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self.tokens = min(float(self.limit), self.tokens + elapsed * self.rate)
+
+    async def acquire(self) -> None:
+        """Waits until a token is available and takes it. Requests are
+        released in the order they were queued.
+        """
+        self._waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = monotonic()
+                    self._refill(now)
+                    delay = self._blocked_until - now
+                    if delay <= 0:
+                        if self.tokens >= 1:
+                            self.tokens -= 1
+                            return
+
+                        delay = (1 - self.tokens) / self.rate
+
+                    self.total_wait += delay
+                    await asyncio.sleep(delay)
+        finally:
+            self._waiting -= 1
+
+    def update(self, status: int, headers: Mapping[str, str]) -> None:
+        """Updates the bucket from the status and headers of a response.
+
+        status: :class:`int`
+            The response status code.
+        headers: Mapping[:class:`str`, :class:`str`]
+            The response headers.
+        """
+        now = monotonic()
+        self._refill(now)
+
+        if (limit := headers.get('X-RateLimit-Limit')) is not None:
+            try:
+                self.limit = max(int(limit), 1)
+            except ValueError:
+                pass
+
+        if (remaining := headers.get('X-RateLimit-Remaining')) is not None:
+            try:
+                left = int(remaining)
+            except ValueError:
+                left = None
+
+            if left is not None:
+                if self._window_start is None or left >= self.limit - 1:
+                    self._window_start = now
+
+                self.tokens = min(self.tokens, float(left))
+                if left <= 0:
+                    self._blocked_until = max(self._blocked_until,
+                                              self._window_start + self.period)
+
+        if status == 429:
+            self.tokens = 0.0
+            retry = self.period / self.limit
+            try:
+                retry = float(headers.get('Retry-After', retry))
+            except ValueError:
+                pass
+
+            self._blocked_until = max(self._blocked_until, now + retry)
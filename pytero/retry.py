@@ -0,0 +1,91 @@
+"""Retry policy definitions for Pytero HTTP requests."""
+
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from random import uniform
+from time import time
+
+
+__all__ = ('RetryPolicy',)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """The policy used by :class:`RequestManager` to retry transient request
+    failures. Only ``methods`` are retried unless a request explicitly opts
+    in, as the other methods are not safe to repeat.
+
+    max_attempts: :class:`int`
+        The maximum number of attempts per request, including the first one
+        (default is ``3``).
+    backoff: :class:`float`
+        The delay in seconds before the first retry (default is ``0.5``).
+    multiplier: :class:`float`
+        The factor the delay grows by for each attempt (default is ``2``).
+    max_delay: :class:`float`
+        The maximum delay in seconds between attempts (default is ``30``).
+    jitter: :class:`float`
+        The fraction of the delay to randomly add or remove, between ``0``
+        and ``1`` (default is ``0.5``).
+    statuses: tuple[:class:`int`, ...]
+        The response statuses that are retried (default is 429, 502, 503 and
+        504).
+    methods: tuple[:class:`str`, ...]
+        The HTTP methods that are retried by default (default is ``GET``).
+    respect_retry_after: :class:`bool`
+        Whether the ``Retry-After`` header should be used as the delay when
+        it is present (default is ``True``).
+    """
+    max_attempts: int = 3
+    backoff: float = 0.5
+    multiplier: float = 2.0
+    max_delay: float = 30.0
+    jitter: float = 0.5
+    statuses: tuple[int, ...] = (429, 502, 503, 504)
+    methods: tuple[str, ...] = ('GET',)
+    respect_retry_after: bool = True
+
+    def __repr__(self) -> str:
+        return f'<RetryPolicy max_attempts={self.max_attempts}>'
+
+    def allows(self, method: str, attempt: int, *,
+               force: bool = False) -> bool:
+        """Returns ``True`` if a request can be attempted again.
+
+        method: :class:`str`
+            The HTTP method of the request.
+        attempt: :class:`int`
+            The number of attempts already made.
+        force: Optional[:class:`bool`]
+            Whether the caller opted in to retrying this request (default is
+            ``False``).
+        """
+        if attempt >= self.max_attempts:
+            return False
+
+        return force or method in self.methods
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """Returns the number of seconds to wait before the next attempt.
+
+        attempt: :class:`int`
+            The number of attempts already made.
+        retry_after: Optional[:class:`str`]
+            The value of the ``Retry-After`` header, if any (default is
+            ``None``).
+        """
+        if self.respect_retry_after and retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+
+            try:
+                date = parsedate_to_datetime(retry_after)
+                return max(date.timestamp() - time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+
+        delay = min(self.backoff * self.multiplier ** (attempt - 1),
+                    self.max_delay)
+        return max(delay * (1 + uniform(-self.jitter, self.jitter)), 0.0)
@@ -1,24 +1,249 @@
-from json import loads
-from time import time
-from typing import Any, Callable, Coroutine, overload
-from aiohttp import ClientSession, ClientWebSocketResponse, WSMessage
-from .errors import ShardError
+import asyncio
+from base64 import urlsafe_b64decode
+from collections import deque
+from itertools import islice
+from functools import partial
+from random import uniform
+from time import monotonic, time
+from typing import Any, Callable, Coroutine, Iterable, Iterator, overload
+from aiohttp import ClientError, ClientSession, ClientWebSocketResponse, \
+    TCPConnector, WSMessage, WSMsgType
+from .errors import EventError, PteroAPIError, RequestError, ShardError
 from .events import Emitter
+from .retry import RetryPolicy
 from .types import _Http, WebSocketEvent
 
 
-__all__ = ('Shard',)
+__all__ = ('Shard', 'ShardManager')
+
+_CONNECTION_ERRORS = (ClientError, OSError, RequestError, asyncio.TimeoutError)
+# the panel refuses the websocket for good with these, the rest are retried
+_FATAL_STATUSES = ('401', '403', '404', '409')
+
+
+def _retryable(error: Exception, retry: RetryPolicy) -> bool:
+    if isinstance(error, _CONNECTION_ERRORS):
+        return True
+
+    if not isinstance(error, PteroAPIError):
+        return False
+
+    statuses = {str(s) for s in error.statuses.values()}
+    if statuses & {str(s) for s in (429, *retry.statuses)}:
+        return True
+
+    return not statuses & set(_FATAL_STATUSES)
+
+
+def _token_expiry(token: str, loads: Callable[[bytes], Any]) -> float | None:
+    # the claims are only read to schedule a refresh, wings verifies them
+    try:
+        claims = token.split('.')[1]
+        data = loads(urlsafe_b64decode(claims + '=' * (-len(claims) % 4)))
+        return float(data['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _raw(loads: Callable[[bytes], Any], args: Any) -> tuple[Any]:
+    return (args,)
+
+
+def _no_args(loads: Callable[[bytes], Any], args: list[str]) -> tuple:
+    return ()
+
+
+def _first(loads: Callable[[bytes], Any], args: list[str]) -> tuple[str]:
+    return (args[0],)
+
+
+def _text(loads: Callable[[bytes], Any], args: list[str]) -> tuple[str]:
+    return (''.join(args),)
+
+
+def _json(loads: Callable[[bytes], Any], args: list[str]) -> tuple[Any]:
+    return (loads(args[0] if len(args) == 1 else ''.join(args)),)
+
+
+def _backup(
+    uuid: str,
+    loads: Callable[[bytes], Any],
+    args: list[str]
+) -> tuple[dict[str, Any] | None]:
+    payload = loads(''.join(args)) if args else None
+    # wings suffixes the event with the backup uuid
+    if uuid and isinstance(payload, dict):
+        payload.setdefault('uuid', uuid)
+
+    return (payload,)
+
+
+# wings event: (emitted event, argument parser, whether handlers keep order)
+_DISPATCH: dict[str, tuple[str, Callable[..., tuple], bool]] = {
+    'status': ('on_status_update', _first, True),
+    'stats': ('on_stats_update', _json, False),
+    'daemon message': ('on_daemon_log', _text, True),
+    'install start': ('on_install_start', _no_args, True),
+    'install output': ('on_install_log', _text, True),
+    'install completed': ('on_install_end', _no_args, True),
+    'transfer logs': ('on_transfer_log', _text, True),
+    'transfer status': ('on_transfer_status', _text, True)}
 
 
 class Shard(Emitter):
-    def __init__(self, http: _Http, identifier: str) -> None:
+    """A websocket connection to a server. While launched, the shard keeps
+    itself connected: expired tokens are renewed in place and dropped
+    connections are retried with exponential backoff and jitter until the
+    retry budget runs out. ``on_reconnect`` is emitted with the attempt number
+    and the delay before each retry. Panel errors when fetching the token are
+    retried the same way, except ``401``, ``403``, ``404`` and ``409``, which
+    fail the shard straight away.
+
+    The connection state is available through :attr:`state`, which is one of
+    ``idle``, ``connecting``, ``authenticating``, ``connected``,
+    ``reconnecting``, ``closed`` or ``failed``. If the shard failed,
+    :attr:`error` holds the exception.
+
+    http: :class:`RequestManager`
+        The request manager to fetch authentication tokens with.
+    identifier: :class:`str`
+        The identifier of the server.
+    session: Optional[:class:`ClientSession`]
+        The session to connect with (default is ``None``, a session owned by
+        the shard).
+    reconnect: Optional[:class:`bool`]
+        Whether to reconnect when the connection drops (default is ``True``).
+    retry: Optional[:class:`RetryPolicy`]
+        The backoff and the maximum number of consecutive failed connection
+        attempts. The count resets once a connection authenticates (default is
+        10 attempts with a backoff of 1 second, up to 60 seconds).
+    refresh_before: Optional[:class:`float`]
+        The number of seconds before the token expires to refresh it, read
+        from the token's ``exp`` claim (default is ``90``).
+    refresh_jitter: Optional[:class:`float`]
+        The maximum number of seconds to randomly refresh earlier by, so that
+        shards connected together do not refresh together (default is
+        ``60``).
+    send_queue: Optional[:class:`int`]
+        The maximum number of outgoing frames to queue (default is ``256``).
+    overflow: Optional[:class:`str`]
+        What to do when the queue is full: ``block`` to wait for space, or
+        ``drop_oldest`` to drop the oldest queued frame (default is
+        ``block``).
+    console_buffer: Optional[:class:`int`]
+        The number of recent console lines to keep for :meth:`tail`, which is
+        also the most lines held for ``on_output_batch`` (default is
+        ``1000``).
+    batch_size: Optional[:class:`int`]
+        The number of console lines that triggers an ``on_output_batch``
+        event (default is ``100``).
+    batch_interval: Optional[:class:`float`]
+        The maximum number of seconds to hold console lines before an
+        ``on_output_batch`` event (default is ``0.1``).
+    event_queue: Optional[:class:`int`]
+        The maximum number of received events to hold for their handlers
+        (default is ``1000``).
+    max_handlers: Optional[:class:`int`]
+        The maximum number of unordered handlers, such as those for
+        ``on_stats_update``, to run at once (default is ``8``).
+
+    Outgoing frames are queued and written in order by a writer task once the
+    connection is authenticated, surviving reconnects. Frames sent before
+    :meth:`launch` are written once the first connection is authenticated.
+    The send methods return an awaitable that resolves to ``True`` once the
+    frame is written, or ``False`` if it was dropped, or if the shard was
+    closed or failed first; awaiting it is optional.
+
+    Console lines are delivered to ``on_output_batch`` as lists from a
+    separate task, so slow handlers do not hold up the connection. If the
+    handlers fall behind by more than ``console_buffer`` lines, the oldest
+    undelivered lines are dropped.
+
+    Event handlers never run in the receive loop. Received events are queued
+    and their handlers run by a dispatcher task, in the order the events were
+    received, except for ``on_stats_update`` and ``on_backup_complete``
+    which run concurrently. Events are only parsed and queued if they have a
+    handler. If the handlers fall behind by more than ``event_queue`` events,
+    the oldest are dropped and counted in :attr:`dropped_events`. A failing
+    handler is reported through ``on_debug`` and does not stop the shard.
+    """
+
+    def __init__(
+        self,
+        http: _Http,
+        identifier: str,
+        *,
+        session: ClientSession = None,
+        reconnect: bool = True,
+        retry: RetryPolicy = None,
+        refresh_before: float = 90.0,
+        refresh_jitter: float = 60.0,
+        send_queue: int = 256,
+        overflow: str = 'block',
+        console_buffer: int = 1000,
+        batch_size: int = 100,
+        batch_interval: float = 0.1,
+        event_queue: int = 1000,
+        max_handlers: int = 8
+    ) -> None:
+        if overflow not in ('block', 'drop_oldest'):
+            raise ValueError(f"invalid overflow mode '{overflow}'")
+
         super().__init__()
         self._http = http
+        self._session = session
+        self._own_session: ClientSession | None = None
+        self._limit: asyncio.Semaphore | None = None
+        self._manager: ShardManager | None = None
         self._conn: ClientWebSocketResponse = None
+        self._prefetched: dict[str, str] | None = None
+        self._opened = asyncio.Event()
+        self._running = False
+        self._stopping = False
+        self._stop = asyncio.Event()
+        self._expired = False
+        self._authed = False
+        self._ready = asyncio.Event()
+        self._outbox: deque[tuple[dict[str, Any], asyncio.Future]] = deque()
+        self._queued = asyncio.Event()
+        # frames waiting for room in a full outbox, in the order they were sent
+        self._blocked: deque[tuple[dict[str, Any], asyncio.Future]] = deque()
+        self._stats: asyncio.Future | None = None
+        self._pending: deque[str] = deque(maxlen=console_buffer)
+        self._pending_lines = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._inbox: deque[tuple[Any, ...]] = deque(maxlen=event_queue)
+        self._inbox_ready = asyncio.Event()
+        self._handlers: set[asyncio.Task] = set()
+        self._renewing: asyncio.Task | None = None
         self.origin: str = http.url
         self.identifier: str = identifier
         self.ping: float = float('nan')
         self.last_ping: float = float('nan')
+        self.state: str = 'idle'
+        self.error: Exception | None = None
+        self.reconnect = reconnect
+        self.retry = retry or RetryPolicy(max_attempts=10, backoff=1.0,
+                                          max_delay=60.0)
+        self.reconnects = 0
+        self.refresh_before = refresh_before
+        self.refresh_jitter = refresh_jitter
+        self.token_expires: float | None = None
+        self.refresh_at: float | None = None
+        self.send_queue = send_queue
+        self.overflow = overflow
+        self.sent = 0
+        self.dropped = 0
+        self.console: deque[str] = deque(maxlen=console_buffer)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.dropped_lines = 0
+        self.max_handlers = max_handlers
+        self.handled = 0
+        self.dropped_events = 0
+        self.queue_peak = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
 
     def __repr__(self) -> str:
         return f'<Shard identifier={self.identifier}>'
@@ -27,6 +252,18 @@ class Shard(Emitter):
     def closed(self) -> bool:
         return self._conn is None
 
+    @property
+    def queue_depth(self) -> int:
+        """The number of received events waiting for their handlers."""
+        return len(self._inbox)
+
+    @property
+    def latency(self) -> float:
+        """The mean number of seconds from receiving an event to its handlers
+        completing.
+        """
+        return self.latency_total / self.handled if self.handled else 0.0
+
     @overload
     def event(self,
               func: Coroutine[Any, Any, Callable[[str], None]]
@@ -37,12 +274,27 @@ class Shard(Emitter):
         super().add_event(func.__name__, func)
         return func
 
+    async def _emit(self, name: str, *args) -> None:
+        await super().emit_event(name, *args)
+        if self._manager is not None:
+            await self._manager.emit_event(name, self.identifier, *args)
+
+    def _handles(self, name: str, /) -> bool:
+        return super().has_event(name) or (
+            self._manager is not None and self._manager.has_event(name))
+
     async def _debug(self, msg: str, /) -> None:
-        await super().emit_event('on_debug', f'debug {self.identifier}: {msg}')
+        await self._emit('on_debug', f'debug {self.identifier}: {msg}')
 
-    def _evt(self, name: str, args: list[str] = None) -> dict[str, list[str]]:
+    def _evt(
+        self,
+        name: str,
+        args: str | list[str] = None
+    ) -> dict[str, list[str]]:
         if args is None:
             args = []
+        elif isinstance(args, str):
+            args = [args]
 
         return {'event': name, 'args': args}
 
@@ -50,100 +302,666 @@ class Shard(Emitter):
         if self.closed:
             raise ShardError('connection not available for this shard')
 
+        auth = await self._auth()
+        await self._conn.send_json(self._evt('auth', auth['token']))
+        self._schedule(auth['token'])
+
+    def _schedule(self, token: str, /) -> None:
+        self.token_expires = _token_expiry(token, self._http.codec.loads)
+        if self.token_expires is None:
+            self.refresh_at = None
+            return
+
+        lead = self.refresh_before + uniform(0, self.refresh_jitter)
+        # short-lived tokens are refreshed halfway through instead
+        lead = min(lead, (self.token_expires - time()) / 2)
+        self.refresh_at = self.token_expires - lead
+
+    async def _refresh_loop(self) -> None:
+        while self.refresh_at is not None:
+            await asyncio.sleep(max(self.refresh_at - time(), 0))
+            try:
+                await self._heartbeat()
+            except Exception as ex:
+                await self._debug(f'failed to refresh token: {ex}')
+                self.refresh_at = time() + 5
+
+    async def _auth(self) -> dict[str, str]:
         auth: dict[str, Any] = await self._http.get(
             f'/servers/{self.identifier}/websocket')
-        await self._conn.send_json(self._evt('auth', auth['data']['token']))
+        return auth['data']
+
+    async def _open(self) -> None:
+        self.state = 'connecting'
+        self._authed = False
+        self._ready.clear()
+        await self._debug(f'connecting to {self.identifier}')
+        try:
+            auth, self._prefetched = self._prefetched, None
+            if auth is None:
+                auth = await self._auth()
+
+            session = self._session
+            if session is None:
+                if self._own_session is None or self._own_session.closed:
+                    self._own_session = ClientSession()
+
+                session = self._own_session
+
+            await self._debug('attempting to connect to websocket')
+            if self._limit is not None:
+                async with self._limit:
+                    conn = await session.ws_connect(auth['socket'],
+                                                    origin=self.origin)
+            else:
+                conn = await session.ws_connect(auth['socket'],
+                                                origin=self.origin)
+
+            self._conn = conn
+            self.state = 'authenticating'
+            await self._debug('authenticating connection')
+            await conn.send_json(self._evt('auth', auth['token']))
+            self._schedule(auth['token'])
+            await self._debug('authentication sent')
+        finally:
+            self._opened.set()
+
+    async def _listen(self) -> None:
+        conn = self._conn
+        try:
+            async for msg in conn:
+                if msg.type is WSMsgType.TEXT:
+                    await self._on_event(msg)
+                elif msg.type is WSMsgType.ERROR:
+                    raise msg.data
+        finally:
+            self._ready.clear()
+            await conn.close()
+            if self._conn is conn:
+                self._conn = None
 
     async def launch(self) -> None:
-        if not self.closed:
+        """Connects to the server websocket and keeps the connection open
+        until :meth:`close` is called, the retry budget runs out or an
+        unhandled ``daemon error`` or ``jwt error`` is received.
+        """
+        if self._running:
             return
 
-        await self._debug(f'connecting to {self.identifier}')
-        auth: dict[str, Any] = await self._http.get(
-            '/servers/%s/websocket' % self.identifier)
-        await self._debug('attempting to connect to websocket')
-
-        async with ClientSession() as session:
-            async with session.ws_connect(auth['data']['socket'],
-                                          origin=self.origin) as self._conn:
-                await self._debug('authenticating connection')
-                await self._conn.send_json(self._evt('auth',
-                                                     auth['data']['token']))
-                await self._debug('authentication sent')
-
-                async for msg in self._conn:
-                    await self._on_event(msg)
+        self._running = True
+        self._stopping = False
+        self._stop.clear()
+        failures = 0
+        writer = asyncio.ensure_future(self._writer())
+        flusher = asyncio.ensure_future(self._flusher())
+        dispatcher = asyncio.ensure_future(self._dispatcher())
+        try:
+            while True:
+                try:
+                    if self._conn is None:
+                        await self._open()
+
+                    if self._stopping:
+                        # close() was called while the connection was opening
+                        break
+
+                    # managed shards are refreshed together by the manager
+                    refresher = None
+                    if self._manager is None:
+                        refresher = asyncio.ensure_future(
+                            self._refresh_loop())
+                    try:
+                        await self._listen()
+                    finally:
+                        if refresher is not None:
+                            refresher.cancel()
+                except Exception as ex:
+                    self.error = ex
+                    if not _retryable(ex, self.retry):
+                        self.state = 'failed'
+                        raise
+
+                    await self._debug(f'connection failed: {ex}')
+
+                if self._stopping or not self.reconnect:
+                    break
+
+                if self._expired:
+                    # a fresh token is fetched on the next connection
+                    self._expired = False
+                    failures = 0
+                    continue
+
+                if self._authed:
+                    failures = 0
+
+                failures += 1
+                if not self.retry.allows('GET', failures, force=True):
+                    self.state = 'failed'
+                    raise ShardError(
+                        f'failed to reconnect to {self.identifier} after '
+                        f'{failures - 1} attempts') from self.error
+
+                delay = self.retry.delay(failures)
+                self.state = 'reconnecting'
+                self.reconnects += 1
+                await self._emit('on_reconnect', failures, delay)
+                try:
+                    await asyncio.wait_for(self._stop.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+                if self._stopping:
+                    break
+        finally:
+            self._running = False
+            if self._conn is not None:
+                conn, self._conn = self._conn, None
+                await conn.close()
+
+            self._inbox_ready.set()
+            writer.cancel()
+            flusher.cancel()
+            # queued events are still handled before stopping
+            await asyncio.gather(writer, flusher, dispatcher,
+                                 return_exceptions=True)
+            await self._flush()
+            for _, future in (*self._outbox, *self._blocked):
+                self._resolve(future, False)
+
+            self._outbox.clear()
+            self._blocked.clear()
+
+            if self.state != 'failed':
+                self.state = 'closed'
+
+            if self._own_session is not None:
+                await self._own_session.close()
+                self._own_session = None
+
+    async def close(self) -> None:
+        """Closes the connection and stops the shard from reconnecting."""
+        self._stopping = True
+        self._stop.set()
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await conn.close()
 
     def destroy(self) -> None:
         if not self.closed:
-            self._conn.close()
-            self._conn = None
+            self._stopping = True
+            self._stop.set()
+            conn, self._conn = self._conn, None
+            if conn is not None:
+                asyncio.ensure_future(conn.close())
 
     async def _on_event(self, event: WSMessage, /) -> None:
-        json = event.json()
-        await super().emit_event('on_raw', json)
+        json = self._http.codec.loads(event.data)
+        if self._handles('on_raw'):
+            self._dispatch('on_raw', _raw, json)
+
         data = WebSocketEvent(**json)
-        await self._debug(f'received event: {data.event}')
-
-        match data.event:
-            case 'auth success':
-                self.ping = time() - self.last_ping
-                self.last_ping = time()
-                await super().emit_event('on_auth_success')
-            case 'token expiring':
-                await self._heartbeat()
-            case 'token expired':
-                self.destroy()
-                await self.launch()
-            case 'daemon error' | 'jwt error':
-                if super().has_event('on_error'):
-                    await super().emit_event('on_error', ''.join(data.args))
-                else:
-                    self.destroy()
-                    raise ShardError(''.join(data.args))
-            case 'status':
-                await super().emit_event('on_status_update', data.args[0])
-            case 'stats':
-                p = loads(''.join(data.args))
-                await super().emit_event('on_stats_update', p)
-            case 'console output':
-                await super().emit_event('on_output', ''.join(data.args))
-            case 'daemon message':
-                await super().emit_event('on_daemon_log', ''.join(data.args))
-            case 'install start':
-                await super().emit_event('on_install_start')
-            case 'install output':
-                await super().emit_event('on_install_log', ''.join(data.args))
-            case 'install completed':
-                await super().emit_event('on_install_end')
-            case 'transfer logs':
-                await super().emit_event('on_transfer_log', ''.join(data.args))
-            case 'transfer status':
-                await super().emit_event('on_transfer_status',
-                                         ''.join(data.args))
-            case 'backup completed':
-                p = None
-                if len(data.args) > 0:
-                    p = loads(''.join(data.args))
-
-                await super().emit_event('on_backup_complete', p)
-            case _:
-                await super().emit_event('on_error',
-                                         f"received unknown event \
-                                            '{data.event}'")
-
-    def request_logs(self) -> None:
-        if not self.closed:
-            self._conn.send_json(self._evt('send command'))
+        args = data.args or []
+        if self._handles('on_debug'):
+            self._dispatch('on_debug', _raw,
+                           f'debug {self.identifier}: received event: '
+                           f'{data.event}')
 
-    def request_stats(self) -> None:
-        if not self.closed:
-            self._conn.send_json(self._evt('send stats'))
+        name, _, suffix = data.event.partition(':')
+        if (entry := _DISPATCH.get(name)) is not None:
+            if self._handles(entry[0]):
+                self._dispatch(*entry[:2], args, entry[2])
+        elif (inline := self._INLINE.get(name)) is not None:
+            await inline(self, args, suffix)
+        elif self._handles('on_error'):
+            self._dispatch('on_error', _raw,
+                           f"received unknown event '{data.event}'")
 
-    def send_command(self, cmd: str, /) -> None:
-        if not self.closed:
-            self._conn.send_json(self._evt('send command', cmd))
+    async def _on_auth(self, args: list[str], suffix: str) -> None:
+        self.state = 'connected'
+        self._authed = True
+        self._ready.set()
+        self.ping = time() - self.last_ping
+        self.last_ping = time()
+        if self._handles('on_auth_success'):
+            self._dispatch('on_auth_success', _no_args, args)
 
-    def send_state(self, state: str, /) -> None:
-        if not self.closed:
-            self._conn.send_json(self._evt('set state', state))
+    async def _on_token_expiring(self, args: list[str], suffix: str) -> None:
+        # skipped if the token was already refreshed on schedule
+        if self.token_expires is not None and \
+                self.token_expires - time() > self.refresh_before:
+            return
+
+        if self._renewing is None or self._renewing.done():
+            self._renewing = asyncio.ensure_future(self._renew())
+
+    async def _on_token_expired(self, args: list[str], suffix: str) -> None:
+        # closing ends the receive loop and launch reconnects
+        self._expired = True
+        await self._conn.close()
+
+    async def _on_daemon_error(self, args: list[str], suffix: str) -> None:
+        if self._handles('on_error'):
+            self._dispatch('on_error', _text, args)
+        else:
+            self.destroy()
+            raise ShardError(''.join(args))
+
+    async def _on_console(self, args: list[str], suffix: str) -> None:
+        line = ''.join(args)
+        self.console.append(line)
+        if self._handles('on_output_batch'):
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped_lines += 1
+
+            self._pending.append(line)
+            self._pending_lines.set()
+            if len(self._pending) >= self.batch_size:
+                self._batch_full.set()
+                # buffered frames are read without suspending, so let the
+                # flusher take the batch
+                await asyncio.sleep(0)
+
+        if self._handles('on_output'):
+            self._dispatch('on_output', _raw, line)
+
+    async def _on_backup(self, args: list[str], suffix: str) -> None:
+        if self._handles('on_backup_complete'):
+            self._dispatch('on_backup_complete', partial(_backup, suffix),
+                           args, False)
+
+    _INLINE: dict[str, Callable[..., Coroutine[Any, Any, None]]] = {
+        'auth success': _on_auth,
+        'token expiring': _on_token_expiring,
+        'token expired': _on_token_expired,
+        'daemon error': _on_daemon_error,
+        'jwt error': _on_daemon_error,
+        'console output': _on_console,
+        'backup completed': _on_backup}
+
+    async def _renew(self) -> None:
+        try:
+            await self._heartbeat()
+        except Exception as ex:
+            await self._debug(f'failed to refresh token: {ex}')
+
+    def _dispatch(
+        self,
+        name: str,
+        parse: Callable[..., tuple],
+        args: Any,
+        ordered: bool = True
+    ) -> None:
+        if len(self._inbox) == self._inbox.maxlen:
+            self.dropped_events += 1
+
+        self._inbox.append((name, parse, args, ordered, monotonic()))
+        self.queue_peak = max(self.queue_peak, len(self._inbox))
+        self._inbox_ready.set()
+
+    async def _handle(
+        self,
+        name: str,
+        parse: Callable[..., tuple],
+        args: Any,
+        received: float
+    ) -> None:
+        try:
+            await self._emit(name, *parse(self._http.codec.loads, args))
+        except Exception as ex:  # pylint: disable=W0703
+            if name != 'on_debug':
+                await self._debug(f'{name} handler failed: {ex}')
+
+        elapsed = monotonic() - received
+        self.handled += 1
+        self.latency_total += elapsed
+        self.latency_max = max(self.latency_max, elapsed)
+
+    async def _dispatcher(self) -> None:
+        while self._running or self._inbox:
+            if not self._inbox:
+                self._inbox_ready.clear()
+                await self._inbox_ready.wait()
+                continue
+
+            name, parse, args, ordered, received = self._inbox.popleft()
+            if ordered:
+                await self._handle(name, parse, args, received)
+                continue
+
+            if len(self._handlers) >= self.max_handlers:
+                await asyncio.wait(self._handlers,
+                                   return_when=asyncio.FIRST_COMPLETED)
+
+            task = asyncio.ensure_future(
+                self._handle(name, parse, args, received))
+            self._handlers.add(task)
+            task.add_done_callback(self._handlers.discard)
+
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    def tail(self, n: int = None, /) -> list[str]:
+        """Returns the last ``n`` console lines received, oldest first, or
+        every buffered line if ``n`` is not given.
+
+        n: Optional[:class:`int`]
+            The number of lines to return (default is ``None``).
+        """
+        if n is None:
+            return list(self.console)
+
+        lines = list(islice(reversed(self.console), n))
+        lines.reverse()
+        return lines
+
+    async def _flush(self) -> None:
+        self._pending_lines.clear()
+        self._batch_full.clear()
+        if not self._pending:
+            return
+
+        lines = list(self._pending)
+        self._pending.clear()
+        try:
+            await self._emit('on_output_batch', lines)
+        except EventError as ex:
+            await self._debug(f'output batch handler failed: {ex}')
+
+    async def _flusher(self) -> None:
+        while True:
+            await self._pending_lines.wait()
+            if len(self._pending) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(),
+                                           self.batch_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            await self._flush()
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, written: bool) -> None:
+        if not future.done():
+            future.set_result(written)
+
+    async def _writer(self) -> None:
+        while True:
+            await self._ready.wait()
+            if not self._outbox:
+                self._queued.clear()
+                await self._queued.wait()
+                continue
+
+            # the frame is kept and written after reconnecting
+            conn = self._conn
+            if conn is None or conn.closed:
+                self._ready.clear()
+                continue
+
+            frame, future = self._outbox[0]
+            try:
+                await conn.send_str(self._http.codec.dumps(frame).decode())
+            except _CONNECTION_ERRORS:
+                self._ready.clear()
+                continue
+
+            self._outbox.popleft()
+            if self._blocked:
+                self._outbox.append(self._blocked.popleft())
+
+            self.sent += 1
+            self._resolve(future, True)
+
+    def _send(self, frame: dict[str, Any], /) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        if self._stopping or self.state in ('closed', 'failed'):
+            future.set_result(False)
+            return future
+
+        if self.overflow == 'block' and \
+                (self._blocked or len(self._outbox) >= self.send_queue):
+            # later frames wait behind earlier ones, so the order is kept
+            self._blocked.append((frame, future))
+            return future
+
+        if len(self._outbox) >= self.send_queue:
+            _, oldest = self._outbox.popleft()
+            self.dropped += 1
+            self._resolve(oldest, False)
+
+        self._outbox.append((frame, future))
+        self._queued.set()
+        return future
+
+    def request_logs(self) -> asyncio.Future:
+        return self._send(self._evt('send logs'))
+
+    def request_stats(self) -> asyncio.Future:
+        # a stats request that is still queued covers this one as well
+        if self._stats is None or self._stats.done():
+            self._stats = self._send(self._evt('send stats'))
+
+        return self._stats
+
+    def send_command(self, cmd: str, /) -> asyncio.Future:
+        return self._send(self._evt('send command', cmd))
+
+    def send_state(self, state: str, /) -> asyncio.Future:
+        return self._send(self._evt('set state', state))
+
+
+class ShardManager(Emitter):
+    """Manages websocket shards for many servers over one shared session and
+    connector. Authentication tokens are fetched in parallel, the number of
+    shards connecting at once is limited, and the events from every shard are
+    emitted by the manager with the server identifier as the first argument:
+
+    .. code:: python
+
+        manager = client.create_shard_manager()
+
+        @manager.event
+        async def on_status_update(identifier, status):
+            ...
+
+        manager.add_all(identifiers)
+        await manager.start()
+
+    Events are still emitted by the shards themselves as well. Each shard
+    reconnects on its own as described in :class:`Shard`.
+
+    http: :class:`RequestManager`
+        The request manager to fetch authentication tokens with.
+    max_connecting: Optional[:class:`int`]
+        The maximum number of shards to connect at once (default is ``10``).
+    refresh_rate: Optional[:class:`float`]
+        The maximum number of tokens to refresh per second. Tokens are
+        refreshed before they expire in paced passes over every shard that is
+        due, rather than each shard refreshing on its own (default is ``5``).
+    options: Any
+        The options passed to each :class:`Shard`, such as ``reconnect``,
+        ``retry``, ``send_queue`` and ``overflow``.
+    """
+
+    def __init__(
+        self,
+        http: _Http,
+        *,
+        max_connecting: int = 10,
+        refresh_rate: float = 5.0,
+        **options
+    ) -> None:
+        super().__init__()
+        self._http = http
+        self._refresher: asyncio.Task | None = None
+        self._session: ClientSession | None = None
+        self._connecting = asyncio.Semaphore(max_connecting)
+        self._shards: dict[str, Shard] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.max_connecting = max_connecting
+        self.options = options
+        self.refresh_rate = refresh_rate
+        self.refreshes = 0
+
+    def __repr__(self) -> str:
+        return f'<ShardManager shards={len(self)} ' \
+            f'connected={self.connected}>'
+
+    def __len__(self) -> int:
+        return len(self._shards)
+
+    def __contains__(self, identifier: str) -> bool:
+        return identifier in self._shards
+
+    def __getitem__(self, identifier: str) -> Shard:
+        return self._shards[identifier]
+
+    def __iter__(self) -> Iterator[Shard]:
+        return iter(self._shards.values())
+
+    @overload
+    def event(self,
+              func: Coroutine[Any, Any, Callable[..., None]]
+              ) -> Coroutine[Any, Any, Callable[..., None]]:
+        ...
+
+    def event(self, func: Callable[..., None]) -> Callable[..., None]:
+        super().add_event(func.__name__, func)
+        return func
+
+    @property
+    def session(self) -> ClientSession:
+        """The session shared by every shard."""
+        if self._session is None or self._session.closed:
+            # websockets stay open, so connections are not limited per host
+            self._session = ClientSession(connector=TCPConnector(limit=0))
+
+        return self._session
+
+    @property
+    def connected(self) -> int:
+        """The number of shards with an authenticated connection."""
+        return sum(1 for s in self._shards.values() if s.state == 'connected')
+
+    def states(self) -> dict[str, str]:
+        """Returns a dict of the server identifiers and the connection state
+        of their shards.
+        """
+        return {i: s.state for i, s in self._shards.items()}
+
+    def add(self, identifier: str, /) -> Shard:
+        """Adds a shard for a server and returns it. The shard is connected by
+        the next call to :meth:`start`.
+
+        identifier: :class:`str`
+            The identifier of the server.
+        """
+        if (shard := self._shards.get(identifier)) is None:
+            shard = Shard(self._http, identifier, **self.options)
+            shard._manager = self
+            shard._limit = self._connecting
+            self._shards[identifier] = shard
+
+        return shard
+
+    def add_all(self, identifiers: Iterable[str], /) -> list[Shard]:
+        """Adds a shard for each server and returns them."""
+        return [self.add(i) for i in identifiers]
+
+    async def remove(self, identifier: str, /) -> None:
+        """Disconnects and removes the shard for a server."""
+        await self._stop(identifier)
+        del self._shards[identifier]
+
+    async def _stop(self, identifier: str) -> None:
+        await self._shards[identifier].close()
+        if (task := self._tasks.pop(identifier, None)) is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self, shard: Shard) -> None:
+        try:
+            await shard.launch()
+        except Exception as ex:  # pylint: disable=W0703
+            await shard._debug(f'shard stopped: {ex}')
+
+    async def _refresh(self, shard: Shard) -> None:
+        try:
+            await shard._heartbeat()
+            self.refreshes += 1
+        except Exception as ex:
+            # a failing shard is retried later and never stops the others
+            await shard._debug(f'failed to refresh token: {ex}')
+            shard.refresh_at = time() + 5
+
+    async def _refresh_loop(self) -> None:
+        interval = 1 / self.refresh_rate
+        while True:
+            scheduled = [s.refresh_at for s in self._shards.values()
+                         if s.state == 'connected' and s.refresh_at]
+            # wake up regularly to pick up newly connected shards
+            wake = min(scheduled, default=time() + 5)
+            await asyncio.sleep(min(max(wake - time(), 0), 5))
+
+            # every shard due by now joins this pass
+            now = time()
+            due = [s for s in self._shards.values()
+                   if s.state == 'connected' and s.refresh_at
+                   and s.refresh_at <= now + interval]
+            due.sort(key=lambda s: s.refresh_at)
+            for shard in due:
+                shard.refresh_at = None
+
+            tasks = []
+            for shard in due:
+                tasks.append(asyncio.ensure_future(self._refresh(shard)))
+                await asyncio.sleep(interval)
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def start(self) -> None:
+        """Connects every shard that is not already running and returns once
+        they have all sent their authentication or failed their first
+        connection attempt.
+        """
+        shards = [s for i, s in self._shards.items()
+                  if i not in self._tasks or self._tasks[i].done()]
+        session = self.session
+        for shard in shards:
+            shard._session = session
+            shard._opened.clear()
+            shard.state = 'connecting'
+            shard.error = None
+
+        auths = await asyncio.gather(*(s._auth() for s in shards),
+                                     return_exceptions=True)
+        for shard, auth in zip(shards, auths):
+            # shards that failed to fetch a token retry when launched
+            if not isinstance(auth, BaseException):
+                shard._prefetched = auth
+
+            self._tasks[shard.identifier] = asyncio.ensure_future(
+                self._run(shard))
+
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.ensure_future(self._refresh_loop())
+
+        await asyncio.gather(*(s._opened.wait() for s in shards))
+
+    async def wait(self) -> None:
+        """Waits until every running shard has disconnected."""
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def close(self) -> None:
+        """Disconnects every shard and closes the shared session."""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+            self._refresher = None
+
+        for identifier in list(self._tasks):
+            await self._stop(identifier)
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
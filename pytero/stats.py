@@ -0,0 +1,383 @@
+"""Rolling aggregation of server resource stats for Pytero. NumPy is used for
+the calculations when it is installed, falling back to the standard library.
+"""
+
+from array import array
+from bisect import bisect_right
+from math import ceil
+from time import time
+from typing import Any, Iterable, Sequence
+from .types import Resources
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+__all__ = ('StatsAggregator',)
+
+FIELDS = ('cpu_absolute', 'memory_bytes', 'disk_bytes', 'network_rx_bytes',
+          'network_tx_bytes')
+
+_UNITS = {'s': 1.0, 'm': 60.0, 'h': 3600.0, 'd': 86400.0}
+
+
+def _seconds(value: float | str, /) -> float:
+    if isinstance(value, str):
+        if value[-1:] in _UNITS:
+            return float(value[:-1]) * _UNITS[value[-1]]
+
+        return float(value)
+
+    return float(value)
+
+
+def _values(stats: dict[str, Any] | Resources, /) -> tuple[float, ...]:
+    if isinstance(stats, Resources):
+        return tuple(float(getattr(stats, f)) for f in FIELDS)
+
+    # wings nests the network counters, the panel resources endpoint does not
+    network = stats.get('network') or {}
+    return (
+        float(stats.get('cpu_absolute') or 0),
+        float(stats.get('memory_bytes') or 0),
+        float(stats.get('disk_bytes') or 0),
+        float(stats.get('network_rx_bytes', network.get('rx_bytes')) or 0),
+        float(stats.get('network_tx_bytes', network.get('tx_bytes')) or 0))
+
+
+def _p95(values: Sequence[float], /) -> float:
+    ordered = sorted(values)
+    return ordered[max(ceil(len(ordered) * 0.95) - 1, 0)]
+
+
+class _Ring:
+    def __init__(self, capacity: int, vectorized: bool) -> None:
+        self.capacity = capacity
+        self.vectorized = vectorized
+        self.count = 0
+        self.index = 0
+        if vectorized:
+            self.times = np.zeros(capacity)
+            self.data = np.zeros((len(FIELDS), capacity))
+        else:
+            self.times = array('d', bytes(8 * capacity))
+            self.data = [array('d', bytes(8 * capacity)) for _ in FIELDS]
+
+    @property
+    def nbytes(self) -> int:
+        if self.vectorized:
+            return self.times.nbytes + self.data.nbytes
+
+        return 8 * self.capacity * (1 + len(FIELDS))
+
+    @property
+    def last(self) -> float | None:
+        if self.count == 0:
+            return None
+
+        return self.times[self.index - 1]
+
+    def append(self, timestamp: float, values: tuple[float, ...]) -> None:
+        self.times[self.index] = timestamp
+        if self.vectorized:
+            self.data[:, self.index] = values
+        else:
+            for column, value in zip(self.data, values):
+                column[self.index] = value
+
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def replace(self, values: tuple[float, ...]) -> None:
+        index = self.index - 1
+        if self.vectorized:
+            self.data[:, index] = values
+        else:
+            for column, value in zip(self.data, values):
+                column[index] = value
+
+    def ordered(self, since: float) -> tuple[Any, Any]:
+        """Returns the timestamps and the field columns after ``since``,
+        oldest first.
+        """
+        if self.count < self.capacity:
+            times = self.times[:self.count]
+            data = self.data[:, :self.count] if self.vectorized \
+                else [c[:self.count] for c in self.data]
+        elif self.vectorized:
+            times = np.roll(self.times, -self.index)
+            data = np.roll(self.data, -self.index, axis=1)
+        else:
+            times = self.times[self.index:] + self.times[:self.index]
+            data = [c[self.index:] + c[:self.index] for c in self.data]
+
+        if self.vectorized:
+            start = int(np.searchsorted(times, since, 'right'))
+            return times[start:], data[:, start:]
+
+        start = bisect_right(times, since)
+        return times[start:], [c[start:] for c in data]
+
+
+class StatsAggregator:
+    """Keeps a rolling history of resource stats for each server in fixed-size
+    ring buffers, and computes rolling summaries and downsampled series from
+    it. Each server uses ``capacity * 48`` bytes however long it is monitored.
+
+    The tracked fields are ``cpu_absolute``, ``memory_bytes``,
+    ``disk_bytes``, ``network_rx_bytes`` and ``network_tx_bytes``. Windows and
+    steps are given in seconds or as strings such as ``30s``, ``5m`` or
+    ``1h``.
+
+    capacity: Optional[:class:`int`]
+        The number of samples to keep per server (default is ``720``).
+    min_interval: Optional[:class:`float`]
+        The minimum number of seconds between samples. A sample arriving
+        sooner replaces the latest one (default is ``5``, so the default
+        capacity covers one hour).
+    vectorized: Optional[:class:`bool`]
+        Whether to use NumPy for the buffers and calculations (default is
+        ``None``, only if NumPy is installed).
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int = 720,
+        min_interval: float = 5.0,
+        vectorized: bool | None = None
+    ) -> None:
+        if vectorized is None:
+            vectorized = np is not None
+        elif vectorized and np is None:
+            raise ImportError('numpy is required for vectorized stats')
+
+        self.capacity = capacity
+        self.min_interval = min_interval
+        self.vectorized = vectorized
+        self._rings: dict[str, _Ring] = {}
+
+    def __repr__(self) -> str:
+        return f'<StatsAggregator servers={len(self)} ' \
+            f'vectorized={self.vectorized}>'
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def __contains__(self, identifier: str) -> bool:
+        return identifier in self._rings
+
+    @property
+    def servers(self) -> list[str]:
+        """The identifiers of the servers with stats."""
+        return list(self._rings)
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes used by the buffers of every server."""
+        return sum(r.nbytes for r in self._rings.values())
+
+    def add(
+        self,
+        identifier: str,
+        stats: dict[str, Any] | Resources,
+        /,
+        timestamp: float = None
+    ) -> None:
+        """Records a stats sample for a server.
+
+        identifier: :class:`str`
+            The identifier of the server.
+        stats: dict[:class:`str`, Any] | :class:`Resources`
+            The stats from the ``on_stats_update`` event or the resources
+            endpoint.
+        timestamp: Optional[:class:`float`]
+            The UNIX time of the sample (default is now).
+        """
+        if timestamp is None:
+            timestamp = time()
+
+        if (ring := self._rings.get(identifier)) is None:
+            ring = self._rings[identifier] = _Ring(self.capacity,
+                                                   self.vectorized)
+
+        values = _values(stats)
+        last = ring.last
+        if last is not None and timestamp - last < self.min_interval:
+            ring.replace(values)
+        else:
+            ring.append(timestamp, values)
+
+    def remove(self, identifier: str, /) -> None:
+        """Removes the stats history for a server."""
+        self._rings.pop(identifier, None)
+
+    def attach(self, source) -> None:
+        """Records the stats from the ``on_stats_update`` events of a
+        :class:`Shard` or :class:`ShardManager`.
+
+        source: :class:`Shard` | :class:`ShardManager`
+            The shard or shard manager to record stats from.
+        """
+        if (identifier := getattr(source, 'identifier', None)) is None:
+            source.add_event('on_stats_update', self.add)
+        else:
+            source.add_event('on_stats_update',
+                             lambda stats: self.add(identifier, stats))
+
+    def _window(
+        self,
+        identifier: str,
+        window: float | str,
+        now: float | None
+    ) -> tuple[Any, Any]:
+        if now is None:
+            now = time()
+
+        return self._rings[identifier].ordered(now - _seconds(window))
+
+    def summary(
+        self,
+        identifier: str,
+        /,
+        window: float | str = '1m',
+        *,
+        now: float = None
+    ) -> dict[str, dict[str, float]]:
+        """Returns the rolling ``mean``, ``max``, ``p95`` and ``last`` value
+        of each field over a window, or an empty dict if the window has no
+        samples.
+
+        identifier: :class:`str`
+            The identifier of the server.
+        window: Optional[:class:`float` | :class:`str`]
+            The length of the window (default is ``1m``).
+        now: Optional[:class:`float`]
+            The UNIX time the window ends at (default is now).
+        """
+        times, data = self._window(identifier, window, now)
+        if len(times) == 0:
+            return {}
+
+        if self.vectorized:
+            means = data.mean(axis=1)
+            maxes = data.max(axis=1)
+            p95s = np.percentile(data, 95, axis=1, method='inverted_cdf')
+            return {
+                field: {
+                    'mean': float(means[i]),
+                    'max': float(maxes[i]),
+                    'p95': float(p95s[i]),
+                    'last': float(data[i, -1])}
+                for i, field in enumerate(FIELDS)}
+
+        return {
+            field: {
+                'mean': sum(column) / len(column),
+                'max': max(column),
+                'p95': _p95(column),
+                'last': column[-1]}
+            for field, column in zip(FIELDS, data)}
+
+    def summaries(
+        self,
+        window: float | str = '1m',
+        *,
+        now: float = None
+    ) -> dict[str, dict[str, dict[str, float]]]:
+        """Returns the :meth:`summary` for every server."""
+        return {i: self.summary(i, window, now=now) for i in self._rings}
+
+    def series(
+        self,
+        identifier: str,
+        field: str,
+        /,
+        window: float | str = '1h',
+        step: float | str = '1m',
+        *,
+        how: str = 'mean',
+        now: float = None
+    ) -> list[tuple[float, float]]:
+        """Returns a field downsampled into buckets over a window, as a list
+        of bucket start times and values. Buckets without samples are left
+        out.
+
+        identifier: :class:`str`
+            The identifier of the server.
+        field: :class:`str`
+            The field to return.
+        window: Optional[:class:`float` | :class:`str`]
+            The length of the window (default is ``1h``).
+        step: Optional[:class:`float` | :class:`str`]
+            The length of each bucket (default is ``1m``).
+        how: Optional[:class:`str`]
+            How to combine the samples in a bucket: ``mean``, ``max``, ``min``
+            or ``last`` (default is ``mean``).
+        now: Optional[:class:`float`]
+            The UNIX time the window ends at (default is now).
+        """
+        if field not in FIELDS:
+            raise KeyError(f"unknown stats field '{field}'")
+
+        if how not in ('mean', 'max', 'min', 'last'):
+            raise ValueError(f"invalid aggregation '{how}'")
+
+        if now is None:
+            now = time()
+
+        start = now - _seconds(window)
+        step = _seconds(step)
+        times, data = self._window(identifier, window, now)
+        column = data[FIELDS.index(field)]
+        if len(times) == 0:
+            return []
+
+        if self.vectorized:
+            # buckets end at ``now``, so each one covers (start, start + step]
+            buckets = (-((start - times) // step) - 1).astype(np.int64)
+            size = int(buckets[-1]) + 1
+            counts = np.bincount(buckets, minlength=size)
+            if how == 'mean':
+                values = np.bincount(buckets, column, size) / \
+                    np.maximum(counts, 1)
+            elif how == 'last':
+                values = np.zeros(size)
+                values[buckets] = column
+            else:
+                values = np.full(size, -np.inf if how == 'max' else np.inf)
+                ufunc = np.maximum if how == 'max' else np.minimum
+                ufunc.at(values, buckets, column)
+
+            present = np.nonzero(counts)[0]
+            return [(start + int(b) * step, float(values[b]))
+                    for b in present]
+
+        grouped: dict[int, list[float]] = {}
+        for timestamp, value in zip(times, column):
+            grouped.setdefault(int(-((start - timestamp) // step) - 1),
+                               []).append(value)
+
+        combine = {'mean': lambda v: sum(v) / len(v), 'max': max,
+                   'min': min, 'last': lambda v: v[-1]}[how]
+        return [(start + b * step, combine(v)) for b, v in grouped.items()]
+
+    def top(
+        self,
+        field: str,
+        /,
+        n: int = 10,
+        window: float | str = '5m',
+        *,
+        stat: str = 'mean',
+        now: float = None
+    ) -> list[tuple[str, float]]:
+        """Returns the ``n`` servers with the highest value of a summary
+        statistic for a field, such as the busiest servers by mean CPU.
+        """
+        ranked: Iterable[tuple[str, float]] = (
+            (i, s[field][stat])
+            for i, s in self.summaries(window, now=now).items() if s)
+        return sorted(ranked, key=lambda r: r[1], reverse=True)[:n]
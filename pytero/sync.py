@@ -0,0 +1,395 @@
+"""A local-to-remote directory sync engine for server files in Pytero."""
+
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from fnmatch import fnmatchcase
+from time import monotonic
+from typing import Any, Callable
+from .files import Directory, File
+
+
+__all__ = ('DirectorySync', 'SyncAction', 'SyncPlan', 'SyncSummary')
+
+
+@dataclass
+class SyncAction:
+    """A single change needed to make a remote directory match the local one.
+
+    kind: :class:`str`
+        One of ``mkdir``, ``upload`` or ``delete``.
+    path: :class:`str`
+        The path of the remote file or directory.
+    local: Optional[:class:`str`]
+        The path of the local file or directory, if any.
+    size: :class:`int`
+        The number of bytes to upload.
+    reason: :class:`str`
+        Why the change is needed: ``missing``, ``size``, ``newer``,
+        ``checksum`` or ``extra``.
+    """
+    kind: str
+    path: str
+    local: str | None = None
+    size: int = 0
+    reason: str = ''
+
+    def __repr__(self) -> str:
+        return f'<SyncAction kind={self.kind} path={self.path}>'
+
+
+@dataclass
+class SyncPlan:
+    """The changes needed to sync a directory, in the order they are run."""
+    actions: list[SyncAction] = field(default_factory=list)
+    unchanged: int = 0
+
+    def __repr__(self) -> str:
+        return f'<SyncPlan actions={len(self.actions)} ' \
+            f'unchanged={self.unchanged}>'
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def __iter__(self):
+        return iter(self.actions)
+
+    def of(self, kind: str, /) -> list[SyncAction]:
+        """Returns the actions of the given kind."""
+        return [a for a in self.actions if a.kind == kind]
+
+    @property
+    def bytes(self) -> int:
+        """The total number of bytes to upload."""
+        return sum(a.size for a in self.actions if a.kind == 'upload')
+
+
+@dataclass
+class SyncSummary:
+    """The result of running a :class:`SyncPlan`."""
+    plan: SyncPlan
+    created: int = 0
+    uploaded: int = 0
+    deleted: int = 0
+    bytes: int = 0
+    elapsed: float = 0.0
+    dry_run: bool = False
+    errors: list[tuple[SyncAction, Exception]] = field(default_factory=list)
+
+    def __repr__(self) -> str:
+        return f'<SyncSummary uploaded={self.uploaded} ' \
+            f'deleted={self.deleted} failed={self.failed}>'
+
+    @property
+    def ok(self) -> bool:
+        """Returns ``True`` if every action completed without an error."""
+        return not self.errors
+
+    @property
+    def failed(self) -> int:
+        """The number of actions that failed."""
+        return len(self.errors)
+
+    @property
+    def skipped(self) -> int:
+        """The number of files that were already up to date."""
+        return self.plan.unchanged
+
+    @property
+    def throughput(self) -> float:
+        """The average upload speed in bytes per second."""
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+
+def _timestamp(value: str | None) -> float | None:
+    if not value:
+        return None
+
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def _hash_local(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(65536):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class DirectorySync:
+    """Syncs a local directory to a server directory, uploading, creating and
+    deleting only what differs. Files are compared by size and modification
+    time, or by content hash if ``checksum`` is set.
+
+    local: :class:`str`
+        The path of the local directory to sync from.
+    remote: :class:`Directory`
+        The server directory to sync to. It must already exist.
+    delete: Optional[:class:`bool`]
+        Whether remote files and directories that do not exist locally should
+        be deleted (default is ``False``).
+    checksum: Optional[:class:`bool`]
+        Whether files of the same size should be compared by their SHA-256
+        hash instead of their modification time. This downloads every such
+        remote file (default is ``False``).
+    concurrency: Optional[:class:`int`]
+        The maximum number of requests or transfers to run at once (default
+        is ``4``).
+    exclude: Optional[list[:class:`str`]]
+        Glob patterns for file and directory names or relative paths to leave
+        untouched on both sides (default is ``None``).
+    modify_window: Optional[:class:`float`]
+        The number of seconds a local file must be newer than the remote one
+        by to be uploaded again (default is ``2``).
+    """
+
+    def __init__(
+        self,
+        local: str | os.PathLike,
+        remote: Directory,
+        *,
+        delete: bool = False,
+        checksum: bool = False,
+        concurrency: int = 4,
+        exclude: list[str] = None,
+        modify_window: float = 2.0
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+
+        self.local = os.fspath(local)
+        self.remote = remote
+        self.delete = delete
+        self.checksum = checksum
+        self.concurrency = concurrency
+        self.exclude = exclude or []
+        self.modify_window = modify_window
+
+    def __repr__(self) -> str:
+        return f'<DirectorySync local={self.local} remote={self.remote.path}>'
+
+    def _excluded(self, name: str, rel: str) -> bool:
+        return any(fnmatchcase(name, p) or fnmatchcase(rel, p)
+                   for p in self.exclude)
+
+    def _remote_path(self, rel: str) -> str:
+        return self.remote.path.rstrip('/') + '/' + rel
+
+    def _scan_local(self) -> tuple[dict[str, os.stat_result], set[str]]:
+        files: dict[str, os.stat_result] = {}
+        dirs: set[str] = set()
+        for root, subdirs, names in os.walk(self.local):
+            base = os.path.relpath(root, self.local).replace(os.sep, '/')
+            base = '' if base == '.' else base + '/'
+            subdirs[:] = [d for d in subdirs
+                          if not self._excluded(d, base + d)]
+            dirs.update(base + d for d in subdirs)
+            for name in names:
+                if not self._excluded(name, base + name):
+                    files[base + name] = os.stat(os.path.join(root, name))
+
+        return files, dirs
+
+    async def _scan_remote(self) -> tuple[dict[str, File], set[str]]:
+        files: dict[str, File] = {}
+        dirs: set[str] = set()
+        prefix = len(self.remote.path.rstrip('/')) + 1
+        async for _, entries, subdirs in self.remote.walk(
+                concurrency=self.concurrency, exclude=self.exclude):
+            dirs.update(d.path[prefix:] for d in subdirs
+                        if not self._excluded(d.name, d.path[prefix:]))
+            files.update((f.path[prefix:], f) for f in entries
+                         if not self._excluded(f.name, f.path[prefix:]))
+
+        return files, dirs
+
+    async def _hash_remote(self, file: File) -> str:
+        digest = hashlib.sha256()
+        async with self.remote._http._stream(
+                'GET', await file.get_download_url()) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(65536):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    async def _same_content(self, rel: str, file: File) -> bool:
+        path = os.path.join(self.local, *rel.split('/'))
+        local, remote = await asyncio.gather(
+            asyncio.to_thread(_hash_local, path), self._hash_remote(file))
+        return local == remote
+
+    async def plan(self) -> SyncPlan:
+        """Compares the local and remote directories and returns the changes
+        needed to sync them, without changing anything.
+        """
+        (local, local_dirs), (remote, remote_dirs) = await asyncio.gather(
+            asyncio.to_thread(self._scan_local), self._scan_remote())
+
+        plan = SyncPlan()
+        for rel in sorted(local_dirs - remote_dirs,
+                          key=lambda r: (r.count('/'), r)):
+            plan.actions.append(SyncAction(
+                'mkdir', self._remote_path(rel),
+                os.path.join(self.local, *rel.split('/')), reason='missing'))
+
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def compare(rel: str, stat: os.stat_result) -> str | None:
+            if (file := remote.get(rel)) is None:
+                return 'missing'
+
+            if file.size != stat.st_size:
+                return 'size'
+
+            if self.checksum:
+                async with limit:
+                    same = await self._same_content(rel, file)
+                return None if same else 'checksum'
+
+            mtime = _timestamp(file.modified_at)
+            if mtime is not None and \
+                    stat.st_mtime > mtime + self.modify_window:
+                return 'newer'
+
+            return None
+
+        names = sorted(local)
+        reasons = await asyncio.gather(
+            *(compare(rel, local[rel]) for rel in names))
+        for rel, reason in zip(names, reasons):
+            if reason is None:
+                plan.unchanged += 1
+                continue
+
+            plan.actions.append(SyncAction(
+                'upload', self._remote_path(rel),
+                os.path.join(self.local, *rel.split('/')),
+                local[rel].st_size, reason))
+
+        if self.delete:
+            extra = sorted((remote.keys() - local.keys())
+                           | (remote_dirs - local_dirs))
+            for rel in extra:
+                # deleting a directory removes everything below it
+                parent = rel.rsplit('/', 1)[0] if '/' in rel else ''
+                if parent and parent not in local_dirs:
+                    continue
+
+                plan.actions.append(SyncAction(
+                    'delete', self._remote_path(rel), reason='extra'))
+
+        return plan
+
+    async def run(
+        self,
+        plan: SyncPlan = None,
+        *,
+        dry_run: bool = False,
+        progress: Callable[[SyncAction, Exception | None], Any] = None
+    ) -> SyncSummary:
+        """Syncs the directories and returns a summary of the transfer.
+        Directories are created first, then files are uploaded, then extra
+        remote entries are deleted. A failed action does not stop the others.
+
+        plan: Optional[:class:`SyncPlan`]
+            A plan from :meth:`plan` to run (default is ``None``, a new plan).
+        dry_run: Optional[:class:`bool`]
+            Whether to only plan the changes without running them (default is
+            ``False``).
+        progress: Optional[Callable[[:class:`SyncAction`, ...], Any]]
+            A function called with each action and its error, or ``None``,
+            after it completes (default is ``None``).
+        """
+        start = monotonic()
+        if plan is None:
+            plan = await self.plan()
+
+        summary = SyncSummary(plan, dry_run=dry_run)
+        if dry_run:
+            summary.created = len(plan.of('mkdir'))
+            summary.uploaded = len(plan.of('upload'))
+            summary.deleted = len(plan.of('delete'))
+            summary.bytes = plan.bytes
+            summary.elapsed = monotonic() - start
+            return summary
+
+        http = self.remote._http
+        identifier = self.remote.identifier
+
+        def directory(path: str) -> Directory:
+            return Directory(http, identifier, path.rsplit('/', 1)[0] or '/')
+
+        def done(action: SyncAction, error: Exception | None) -> None:
+            if error is not None:
+                summary.errors.append((action, error))
+            elif action.kind == 'mkdir':
+                summary.created += 1
+            elif action.kind == 'upload':
+                summary.uploaded += 1
+                summary.bytes += action.size
+            else:
+                summary.deleted += 1
+
+            if progress is not None:
+                progress(action, error)
+
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def single(action: SyncAction) -> None:
+            parent = directory(action.path)
+            name = action.path.rsplit('/', 1)[-1]
+            async with limit:
+                try:
+                    if action.kind == 'mkdir':
+                        await parent.create_dir(name)
+                    else:
+                        await parent.delete_dir(name)
+                except Exception as ex:  # pylint: disable=W0703
+                    return done(action, ex)
+
+            done(action, None)
+
+        # parents are created before their children, one depth at a time
+        levels: dict[int, list[SyncAction]] = {}
+        for action in plan.of('mkdir'):
+            levels.setdefault(action.path.count('/'), []).append(action)
+
+        for depth in sorted(levels):
+            await asyncio.gather(*(single(a) for a in levels[depth]))
+
+        groups: dict[str, list[SyncAction]] = {}
+        for action in plan.of('upload'):
+            groups.setdefault(action.path.rsplit('/', 1)[0], []).append(action)
+
+        gate = asyncio.Lock()
+
+        async def upload(actions: list[SyncAction]) -> None:
+            # each directory shares one signed URL, so its uploads are
+            # batched while holding a share of the global limit
+            slots = min(len(actions), self.concurrency)
+            async with gate:
+                for _ in range(slots):
+                    await limit.acquire()
+
+            try:
+                results = await directory(actions[0].path).upload(
+                    [a.local for a in actions], concurrency=slots)
+            finally:
+                for _ in range(slots):
+                    limit.release()
+
+            for action, result in zip(actions, results):
+                done(action, result.error)
+
+        await asyncio.gather(*(upload(g) for g in groups.values()))
+        await asyncio.gather(*(single(a) for a in plan.of('delete')))
+
+        summary.elapsed = monotonic() - start
+        return summary
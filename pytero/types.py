@@ -40,12 +40,17 @@ __all__ = (
 class _Http:
     url: str
     key: str
+    codec: Any
+    listings: Any
+    stream_timeout: float
     _raw: Callable[[str, str, Any | None], Any]
+    _stream: Callable[..., Any]
     get: Callable[[str], Any]
     post: Callable[[str], Any]
     patch: Callable[[str], Any]
     put: Callable[[str], Any]
     delete: Callable[[str], Any]
+    fetch_all: Callable[[str], Any]
 
 
 @dataclass
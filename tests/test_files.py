@@ -0,0 +1,55 @@
+import asyncio
+from pytero.cache import ListingCache
+from pytero.files import Directory, File
+
+
+class FakeHttp:
+    def __init__(self) -> None:
+        self.listings = ListingCache()
+        self.requests: list[tuple[str, str, dict]] = []
+
+    async def put(self, path: str, body: dict) -> None:
+        self.requests.append(('PUT', path, body))
+
+    async def post(self, path: str, body: dict) -> None:
+        self.requests.append(('POST', path, body))
+
+
+def cached(http: FakeHttp, *paths: str) -> FakeHttp:
+    for path in paths:
+        http.listings.set('abc', path, [])
+
+    return http
+
+
+def entry(name: str) -> dict:
+    return {
+        'name': name, 'mode': '-rw-r--r--', 'mode_bits': '644', 'size': 1,
+        'is_file': True, 'is_symlink': False, 'mimetype': 'text/plain',
+        'created_at': '2022-07-01T00:00:00+00:00'}
+
+
+def test_rename_invalidates_destination_directory():
+    http = cached(FakeHttp(), '/plugins', '/other', '/unrelated')
+    file = File(http, 'abc', '/plugins', entry('a.jar'))
+
+    asyncio.run(file.rename('../other/a.jar'))
+
+    assert http.listings.get('abc', '/plugins') is None
+    assert http.listings.get('abc', '/other') is None
+    assert http.listings.get('abc', '/unrelated') == []
+
+
+def test_rename_all_invalidates_destination_directories():
+    http = cached(FakeHttp(), '/plugins', '/plugins/old', '/other',
+                  '/plugins/sub', '/unrelated')
+    directory = Directory(http, 'abc', '/plugins')
+
+    asyncio.run(directory.rename_all([
+        {'from': 'a.jar', 'to': '../other/a.jar'},
+        {'from': 'old', 'to': 'sub/old'}]))
+
+    for path in ('/plugins', '/plugins/old', '/other', '/plugins/sub'):
+        assert http.listings.get('abc', path) is None
+
+    assert http.listings.get('abc', '/unrelated') == []